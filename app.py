@@ -1,10 +1,17 @@
 """HR Resume Analysis RAG Agent - Simplified Flask Application."""
 import os
+import json
+import time
 import logging
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
+from flask import Flask, Response, g, render_template, request, jsonify, flash, redirect, stream_with_context, url_for
 from dotenv import load_dotenv
-from services.document_service import load_documents, create_vector_store, get_vector_store, delete_all_documents
-from services.chat_service import process_chat_question
+from services.document_service import sync_vector_store, rollback_index, get_index_generations
+from services.index_manifest import state_path, index_write_locked
+from services.chat_service import process_chat_question, process_chat_batch, stream_chat_question
+from services.ranking import rank_candidates
+from services.runtime import get_runtime, rebuild_runtime
+from services.jobs import JobRunner
+from services import chat_service, document_service, metrics
 
 # Load environment variables
 load_dotenv()
@@ -18,6 +25,33 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Ingests run one at a time in the background; chat keeps serving the current index (incremental syncs write into it).
+# Job statuses are saved in INDEX_STATE_DIR so every worker can report them.
+ingest_jobs = JobRunner(directory=state_path("jobs"))
+
+
+@app.before_request
+def _start_request_metrics():
+    g.metrics_endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    g.metrics_started = time.perf_counter()
+    metrics.HTTP_IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+
+@app.after_request
+def _finish_request_metrics(response):
+    """Record the request once its response is closed, so streamed responses count their full duration."""
+    endpoint, started = g.get("metrics_endpoint"), g.get("metrics_started")
+    if endpoint is None:
+        return response
+    
+    def record():
+        metrics.HTTP_IN_FLIGHT.dec(endpoint=endpoint)
+        metrics.HTTP_REQUESTS.inc(endpoint=endpoint, status=str(response.status_code))
+        metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+    
+    response.call_on_close(record)
+    return response
+
 @app.route('/')
 def index():
     """Render main page."""
@@ -26,37 +60,89 @@ def index():
 
 @app.route('/update_vectorstore', methods=['POST'])
 def update_vectorstore():
-    """Update vector store with new documents."""
-    file_path = request.form.get('file_path', '').strip() or os.environ.get("FILE_PATH", "")
+    """Start a background job that syncs the vector store with the documents.
+    
+    JSON clients get ``202`` with the job ID and a status URL to poll; form
+    submissions are redirected to the main page, which polls the job. A
+    full rebuild is switched in when complete; an incremental sync updates
+    the serving index as it goes. While any worker is syncing, new requests
+    get ``409``.
+    """
+    payload = request.get_json(silent=True) or request.form
+    wants_json = request.is_json or request.accept_mimetypes.best == 'application/json'
+    file_path = (payload.get('file_path') or '').strip() or os.environ.get("FILE_PATH", "")
     
     if not file_path or not os.path.exists(file_path):
+        if wants_json:
+            return jsonify({"error": f"Invalid path: {file_path}"}), 400
         flash(f"Invalid path: {file_path}", "error")
         return redirect(url_for('index'))
     
-    try:
-        # Clear existing documents
-        if delete_all_documents():
-            flash("Existing documents cleared.", "info")
-        
-        # Load and process new documents
-        documents = load_documents(file_path)
-        if not documents:
-            flash("No documents found.", "warning")
-            return redirect(url_for('index'))
-        
-        vectorstore = create_vector_store(documents)
-        if vectorstore:
-            flash(f"Successfully updated with {len(documents)} documents.", "success")
-        else:
-            flash("Error creating vector store.", "error")
-            
-    except Exception as e:
-        flash(f"Error: {str(e)}", "error")
-        logger.error(f"Update error: {e}")
+    # One sync at a time across all workers; the index write lock is held for the whole sync
+    if index_write_locked():
+        message = "A vector store update is already running; try again when it finishes."
+        if wants_json:
+            return jsonify({"error": message}), 409
+        flash(message, "warning")
+        return redirect(url_for('index'))
+    
+    # Full rebuild indexes into a new generation; incremental sync only re-embeds changed files
+    rebuild = payload.get('mode', 'incremental') == 'full'
+    job = ingest_jobs.submit("update_vectorstore", _run_ingest, path=file_path, rebuild=rebuild)
+    status_url = url_for('job_status', job_id=job.id)
     
+    if wants_json:
+        return jsonify({"job_id": job.id, "status_url": status_url}), 202
+    flash("Vector store update started.", "info")
+    return redirect(url_for('index', job=job.id))
+
+
+@app.route('/rollback_vectorstore', methods=['POST'])
+def rollback_vectorstore():
+    """Serve the index generation that the last full rebuild replaced."""
+    wants_json = request.is_json or request.accept_mimetypes.best == 'application/json'
+    if index_write_locked():
+        message = "A vector store update is running; roll back when it finishes."
+        if wants_json:
+            return jsonify({"error": message}), 409
+        flash(message, "warning")
+        return redirect(url_for('index'))
+    generation = rollback_index()
+    if generation:
+        rebuild_runtime()
+    
+    if wants_json:
+        if not generation:
+            return jsonify({"error": "No previous index to roll back to."}), 409
+        return jsonify(get_index_generations())
+    if generation:
+        flash(f"Rolled back to index generation {generation}.", "success")
+    else:
+        flash("No previous index to roll back to.", "warning")
     return redirect(url_for('index'))
 
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Report status, progress and throughput of a background job."""
+    status = ingest_jobs.status(job_id)
+    if status is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(status)
+
+
+def _run_ingest(job, path: str, rebuild: bool):
+    """Job body: sync the vector store, then swap in a runtime for the new index."""
+    summary = sync_vector_store(path, rebuild=rebuild, progress=job.update)
+    if summary is None:
+        metrics.INGEST_JOBS.inc(status="failed")
+        raise RuntimeError("Error updating vector store; see logs for details.")
+    if summary["files"]:
+        rebuild_runtime()
+    metrics.INGEST_JOBS.inc(status="succeeded")
+    return summary
+
+
 @app.route('/chat', methods=['POST'])
 def chat():
     """Handle chat requests."""
@@ -65,22 +151,156 @@ def chat():
         if not question:
             return jsonify({"error": "No question provided"}), 400
         
-        vectorstore = get_vector_store()
-        if not vectorstore:
+        runtime = get_runtime()
+        if not runtime:
             return jsonify({"error": "Vector store not available. Please update first."}), 400
         
-        response = process_chat_question(question, vectorstore)
+        try:
+            mode = runtime.resolve_mode(request.json.get('retriever'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        response = process_chat_question(question, runtime, retriever_mode=mode)
         return jsonify(response)
         
     except Exception as e:
         logger.error(f"Chat error: {e}")
+        chat_service.record_chat_error(e)
         return jsonify({"error": f"Error: {str(e)}"}), 500
 
 
+@app.route('/chat/batch', methods=['POST'])
+def chat_batch():
+    """Answer a list of questions in one request.
+    
+    JSON body: ``questions`` (at most CHAT_BATCH_MAX_QUESTIONS), optional
+    ``retriever`` and ``max_concurrency`` (at most CHAT_BATCH_CONCURRENCY).
+    Returns ``results`` in question order; a failed question gets an
+    ``error`` entry instead of failing the whole batch.
+    """
+    payload = request.json or {}
+    questions = payload.get('questions')
+    if not isinstance(questions, list) or not questions:
+        return jsonify({"error": "No questions provided"}), 400
+    questions = [str(question).strip() for question in questions]
+    if not all(questions):
+        return jsonify({"error": "Questions must not be empty"}), 400
+    max_questions = int(os.environ.get('CHAT_BATCH_MAX_QUESTIONS', '500'))
+    if len(questions) > max_questions:
+        return jsonify({"error": f"At most {max_questions} questions per batch"}), 400
+    max_concurrency = int(os.environ.get('CHAT_BATCH_CONCURRENCY', '8'))
+    try:
+        # Requests may lower the configured concurrency, not raise it
+        max_concurrency = max(1, min(max_concurrency, int(payload.get('max_concurrency', max_concurrency))))
+    except (TypeError, ValueError):
+        return jsonify({"error": "max_concurrency must be an integer"}), 400
+    
+    runtime = get_runtime()
+    if not runtime:
+        return jsonify({"error": "Vector store not available. Please update first."}), 400
+    
+    try:
+        mode = runtime.resolve_mode(payload.get('retriever'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        results = process_chat_batch(questions, runtime, retriever_mode=mode, max_concurrency=max_concurrency)
+        return jsonify({"results": results})
+    except Exception as e:
+        logger.error(f"Chat batch error: {e}")
+        chat_service.record_chat_error(e)
+        return jsonify({"error": f"Error: {str(e)}"}), 500
+
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Stream chat responses as Server-Sent Events.
+    
+    Emits a ``sources`` event once retrieval finishes, ``token`` events while
+    the LLM generates, then ``answer`` with the rendered HTML (or ``error``).
+    """
+    payload = request.json or {}
+    question = payload.get('question', '').strip()
+    if not question:
+        return jsonify({"error": "No question provided"}), 400
+    
+    runtime = get_runtime()
+    if not runtime:
+        return jsonify({"error": "Vector store not available. Please update first."}), 400
+    
+    try:
+        mode = runtime.resolve_mode(payload.get('retriever'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    def generate():
+        try:
+            for event, data in stream_chat_question(question, runtime, retriever_mode=mode):
+                yield _sse(event, data)
+        except Exception as e:
+            logger.error(f"Chat stream error: {e}")
+            chat_service.record_chat_error(e)
+            yield _sse("error", {"error": f"Error: {str(e)}"})
+    
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
+
+
+@app.route('/rank', methods=['POST'])
+def rank():
+    """Rank candidates against a job description by embedding similarity, without the LLM.
+    
+    JSON body: ``job_description``, optional ``top_n`` (default 10),
+    ``pooling`` ("max", "mean" or "top_m") and ``top_m`` (default 3).
+    """
+    payload = request.json or {}
+    job_description = str(payload.get('job_description', '')).strip()
+    if not job_description:
+        return jsonify({"error": "No job description provided"}), 400
+    try:
+        top_n = int(payload.get('top_n', 10))
+        top_m = int(payload.get('top_m', 3))
+    except (TypeError, ValueError):
+        return jsonify({"error": "top_n and top_m must be integers"}), 400
+    if top_n < 1 or top_m < 1:
+        return jsonify({"error": "top_n and top_m must be positive"}), 400
+    
+    runtime = get_runtime()
+    if not runtime or runtime.ranker is None:
+        return jsonify({"error": "Vector store not available. Please update first."}), 400
+    
+    try:
+        return jsonify(rank_candidates(job_description, runtime, top_n, payload.get('pooling', 'max'), top_m))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Rank error: {e}")
+        return jsonify({"error": f"Error: {str(e)}"}), 500
+
+
+def _sse(event: str, data) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
 @app.route('/health')
 def health():
     """Health check endpoint."""
-    return jsonify({"status": "healthy", "service": "HR Resume Analysis RAG Agent"})
+    status = {"status": "healthy", "service": "HR Resume Analysis RAG Agent", "index": get_index_generations()}
+    embeddings = document_service.embeddings  # not built yet until the first ingest or query
+    if hasattr(embeddings, "stats"):
+        status["embedding_cache"] = embeddings.stats()
+    completions = getattr(chat_service.llm, "cache", None)
+    if hasattr(completions, "stats"):
+        status["completion_cache"] = completions.stats()
+    return jsonify(status)
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Metrics of this process in the Prometheus text format."""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 if __name__ == '__main__':
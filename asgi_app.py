@@ -0,0 +1,110 @@
+"""ASGI entry point: async chat endpoints, everything else served by the Flask app.
+
+``/chat`` and ``/chat/stream`` run on Quart and await the embedding and
+LLM calls, so a single worker holds many chat requests in flight. All
+other routes (UI, ingest, jobs, ranking, batch) are the Flask views from
+``app.py``, run on a thread pool.
+
+    hypercorn asgi_app:app --bind 0.0.0.0:5000
+"""
+import time
+import asyncio
+import logging
+from quart import Quart, Response, jsonify, request
+from hypercorn.middleware import AsyncioWSGIMiddleware
+from app import app as flask_app, _sse
+from services.chat_service import aprocess_chat_question, astream_chat_question, record_chat_error
+from services.runtime import get_runtime
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+async_app = Quart(__name__)
+wsgi_app = AsyncioWSGIMiddleware(flask_app)
+ASYNC_ROUTES = {"/chat", "/chat/stream"}
+
+
+@async_app.route('/chat', methods=['POST'])
+async def chat():
+    """Handle chat requests without holding a thread during the LLM call."""
+    try:
+        payload = await request.get_json() or {}
+        question = payload.get('question', '').strip()
+        if not question:
+            return jsonify({"error": "No question provided"}), 400
+
+        # Reading the index version touches the filesystem; keep it off the event loop
+        runtime = await asyncio.to_thread(get_runtime)
+        if not runtime:
+            return jsonify({"error": "Vector store not available. Please update first."}), 400
+
+        try:
+            mode = runtime.resolve_mode(payload.get('retriever'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return jsonify(await aprocess_chat_question(question, runtime, retriever_mode=mode))
+
+    except Exception as e:
+        logger.error(f"Chat error: {e}")
+        record_chat_error(e)
+        return jsonify({"error": f"Error: {str(e)}"}), 500
+
+
+@async_app.route('/chat/stream', methods=['POST'])
+async def chat_stream():
+    """Stream chat responses as Server-Sent Events, like the Flask endpoint."""
+    payload = await request.get_json() or {}
+    question = payload.get('question', '').strip()
+    if not question:
+        return jsonify({"error": "No question provided"}), 400
+
+    runtime = await asyncio.to_thread(get_runtime)
+    if not runtime:
+        return jsonify({"error": "Vector store not available. Please update first."}), 400
+
+    try:
+        mode = runtime.resolve_mode(payload.get('retriever'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    async def generate():
+        try:
+            async for event, data in astream_chat_question(question, runtime, retriever_mode=mode):
+                yield _sse(event, data)
+        except Exception as e:
+            logger.error(f"Chat stream error: {e}")
+            record_chat_error(e)
+            yield _sse("error", {"error": f"Error: {str(e)}"})
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(generate(), mimetype='text/event-stream', headers=headers)
+
+
+async def app(scope, receive, send):
+    """Route the async chat endpoints to Quart and every other HTTP request to Flask."""
+    if scope["type"] != "http":
+        await async_app(scope, receive, send)
+    elif scope["path"] not in ASYNC_ROUTES:
+        await wsgi_app(scope, receive, send)  # Flask records its own request metrics
+    else:
+        await _serve_with_metrics(scope, receive, send)
+
+
+async def _serve_with_metrics(scope, receive, send):
+    """Serve an async route, recording the same request metrics as the Flask hooks."""
+    endpoint = scope["path"]
+    status = {"code": 500}
+
+    async def send_with_status(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+        await send(message)
+
+    started = time.perf_counter()
+    with metrics.HTTP_IN_FLIGHT.track(endpoint=endpoint):
+        try:
+            await async_app(scope, receive, send_with_status)
+        finally:
+            metrics.HTTP_REQUESTS.inc(endpoint=endpoint, status=str(status["code"]))
+            metrics.HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
@@ -0,0 +1,172 @@
+"""Concurrent /chat capacity of the sync Flask server versus the ASGI server.
+
+Both servers answer from a local vector store with fake embeddings. The
+LLM is ``ChatOpenAI`` pointed at the fake OpenAI server, which answers
+after ``--llm-latency`` seconds. The sync server runs the Flask app on a
+fixed pool of ``--workers`` threads, the way ``gunicorn -w 4 --threads 2``
+caps it; the async server is one hypercorn worker running ``asgi_app``.
+Each concurrency level sends ``2 x concurrency`` requests from an asyncio
+client.
+
+    python -m benchmarks.bench_async_serving --concurrency 8 64 256
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+import numpy as np
+from benchmarks.fakes import offline_environment, FakeEmbeddings, synthetic_resume
+from benchmarks.fake_openai_server import FakeOpenAIServer
+
+offline_environment()
+
+
+def build_runtime(directory: str, llm_url: str):
+    """Runtime over a local store of synthetic resumes, with the chat model pointed at the fake server."""
+    from langchain_openai import ChatOpenAI
+    from services import chat_service
+    from services.answer_cache import AnswerCache
+    from services.local_store import LocalVectorStore
+    from services.runtime import RAGRuntime
+
+    chat_service.llm = ChatOpenAI(openai_api_key="sk-fake", openai_api_base=llm_url, max_retries=0)
+    chat_service.answer_cache = AnswerCache(max_entries=0)  # every request goes to the LLM
+    store = LocalVectorStore(FakeEmbeddings(), directory)
+    store.add_texts(
+        [synthetic_resume(i, paragraphs=2) for i in range(200)],
+        metadatas=[{"source": f"resume_{i}.txt"} for i in range(200)]
+    )
+    return RAGRuntime(store, version=0)
+
+
+def serve(mode: str, port: int, llm_url: str, workers: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        runtime = build_runtime(directory, llm_url)
+        import app as flask_app
+        flask_app.get_runtime = lambda: runtime
+
+        if mode == "sync":
+            from werkzeug.serving import BaseWSGIServer
+
+            class PooledWSGIServer(BaseWSGIServer):
+                """Werkzeug server handling requests on a fixed number of threads."""
+
+                request_queue_size = 1024
+
+                def __init__(self, *args, **kwargs):
+                    super().__init__(*args, **kwargs)
+                    self.pool = ThreadPoolExecutor(workers)
+
+                def process_request(self, request, client_address):
+                    self.pool.submit(self._handle, request, client_address)
+
+                def _handle(self, request, client_address):
+                    try:
+                        self.finish_request(request, client_address)
+                    except Exception:
+                        self.handle_error(request, client_address)
+                    finally:
+                        self.shutdown_request(request)
+
+            PooledWSGIServer("127.0.0.1", port, flask_app.app).serve_forever()
+        else:
+            from hypercorn.asyncio import serve as hypercorn_serve
+            from hypercorn.config import Config
+            import asgi_app
+            asgi_app.get_runtime = lambda: runtime
+            config = Config()
+            config.bind = [f"127.0.0.1:{port}"]
+            config.backlog = 1024
+            config.accesslog = None
+            asyncio.run(hypercorn_serve(asgi_app.app, config))
+
+
+async def load(url: str, concurrency: int, requests: int):
+    """Send requests with at most concurrency in flight; returns (latencies, errors, elapsed seconds)."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(timeout=600, limits=limits) as client:
+        async def one(i):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.post(f"{url}/chat", json={"question": f"Who has skill number {i}?"})
+                    ok = response.status_code == 200 and "answer" in response.json()
+                except httpx.HTTPError:
+                    ok = False
+                return time.perf_counter() - started, ok
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+    return [latency for latency, ok in results if ok], sum(not ok for _, ok in results), elapsed
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 64, 256])
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=8, help="threads of the sync server")
+    parser.add_argument("--serve", choices=["sync", "async"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--llm-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.serve, args.port, args.llm_url, args.workers)
+
+    llm = FakeOpenAIServer(chat_latency=args.llm_latency).start()
+    with tempfile.TemporaryDirectory() as state_dir:
+        env = {**os.environ, "INDEX_STATE_DIR": state_dir, "EMBEDDING_CACHE_PATH": "", "VECTOR_STORE_BACKEND": "local"}
+        for mode in ("sync", "async"):
+            port = free_port()
+            url = f"http://127.0.0.1:{port}"
+            command = [
+                sys.executable, "-m", "benchmarks.bench_async_serving",
+                "--serve", mode, "--port", str(port), "--llm-url", llm.url, "--workers", str(args.workers)
+            ]
+            process = subprocess.Popen(command, env=env, stderr=subprocess.DEVNULL)
+            try:
+                wait_until_up(url, process)
+                label = f"sync ({args.workers} threads)" if mode == "sync" else "async (1 worker)"
+                for concurrency in args.concurrency:
+                    latencies, errors, elapsed = asyncio.run(load(url, concurrency, 2 * concurrency))
+                    p50, p95 = (1000 * np.percentile(latencies, q) for q in (50, 95)) if latencies else (0, 0)
+                    print(
+                        f"{label:18} concurrency {concurrency:4d}: {len(latencies) / elapsed:7.1f} req/s  "
+                        f"p50 {p50:8.0f} ms  p95 {p95:8.0f} ms  errors {errors}"
+                    )
+            finally:
+                process.terminate()
+                process.wait()
+    llm.shutdown()
+
+
+if __name__ == "__main__":
+    main()
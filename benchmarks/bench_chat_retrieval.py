@@ -0,0 +1,86 @@
+"""Count embedding and vector-search calls per /chat request.
+
+Compares the previous double-retrieval pipeline with the current
+``process_chat_question`` using offline embeddings, vector store and LLM.
+
+    python -m benchmarks.bench_chat_retrieval --requests 50
+"""
+import argparse
+import time
+from functools import partial
+from benchmarks.fakes import offline_environment, FakeEmbeddings, FakeVectorStore, FakeChatModel, synthetic_resume
+
+offline_environment()
+
+from langchain.schema.runnable import RunnablePassthrough  # noqa: E402
+from services import chat_service  # noqa: E402
+from services.answer_cache import AnswerCache  # noqa: E402
+from services.context_packing import context_token_budget  # noqa: E402
+from services.runtime import RAGRuntime  # noqa: E402
+
+QUESTIONS = [
+    "Who has Python experience?",
+    "What are the key skills mentioned in these resumes?",
+    "Compare candidates for this position",
+    "Which candidates know Kubernetes?",
+]
+
+
+def legacy_process_chat_question(question: str, vectorstore) -> dict:
+    """Pipeline as it was before single retrieval: the retriever runs twice."""
+    retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
+    chain = (
+        {"context": retriever | partial(chat_service._format_docs, budget=context_token_budget()), "question": RunnablePassthrough()}
+        | chat_service.HR_PROMPT
+        | chat_service.llm
+    )
+    chain.invoke(question)
+    source_docs = retriever.get_relevant_documents(question)
+    return {"sources": chat_service._format_sources(source_docs)}
+
+
+def run(pipeline, vectorstore, embeddings, requests: int) -> dict:
+    """Run ``requests`` questions through ``pipeline`` and report per-request counts."""
+    embeddings.calls = 0
+    vectorstore.searches = 0
+    started = time.perf_counter()
+    for i in range(requests):
+        pipeline(QUESTIONS[i % len(QUESTIONS)], vectorstore)
+    elapsed = time.perf_counter() - started
+    return {
+        "embedding_calls_per_request": embeddings.calls / requests,
+        "searches_per_request": vectorstore.searches / requests,
+        "ms_per_request": 1000 * elapsed / requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--documents", type=int, default=200)
+    args = parser.parse_args()
+
+    embeddings = FakeEmbeddings()
+    vectorstore = FakeVectorStore.from_texts(
+        [synthetic_resume(i, paragraphs=2) for i in range(args.documents)],
+        embeddings,
+        metadatas=[{"source": f"resume_{i}.txt"} for i in range(args.documents)]
+    )
+    chat_service.llm = FakeChatModel()
+    chat_service.answer_cache = AnswerCache(max_entries=0)  # measure the uncached pipeline
+    runtime = RAGRuntime(vectorstore, version=0)
+
+    def current_process_chat_question(question, vectorstore):
+        return chat_service.process_chat_question(question, runtime)
+
+    for name, pipeline in [("before", legacy_process_chat_question), ("after", current_process_chat_question)]:
+        result = run(pipeline, vectorstore, embeddings, args.requests)
+        print(
+            f"{name:7} embedding calls/request: {result['embedding_calls_per_request']:.1f}  "
+            f"searches/request: {result['searches_per_request']:.1f}  "
+            f"latency: {result['ms_per_request']:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Time to first byte of /chat versus /chat/stream.
+
+Drives the Flask app in-process with an offline vector store and a fake
+LLM that waits ``--llm-latency`` before its first token and
+``--token-latency`` between tokens.
+
+    python -m benchmarks.bench_chat_stream --requests 10
+"""
+import argparse
+import statistics
+import time
+from benchmarks.fakes import offline_environment, FakeEmbeddings, FakeVectorStore, FakeChatModel, synthetic_resume
+
+offline_environment()
+
+import app as flask_app  # noqa: E402
+from services import chat_service  # noqa: E402
+from services.answer_cache import AnswerCache  # noqa: E402
+from services.runtime import RAGRuntime  # noqa: E402
+
+
+def measure(client, path: str, question: str):
+    """Return (time to first body byte, total time) in seconds."""
+    started = time.perf_counter()
+    response = client.post(path, json={"question": question}, buffered=False)
+    first_byte = None
+    for chunk in response.response:
+        if chunk and first_byte is None:
+            first_byte = time.perf_counter() - started
+    total = time.perf_counter() - started
+    response.close()
+    return first_byte if first_byte is not None else total, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    embeddings = FakeEmbeddings()
+    vectorstore = FakeVectorStore.from_texts(
+        [synthetic_resume(i, paragraphs=2) for i in range(100)],
+        embeddings,
+        metadatas=[{"source": f"resume_{i}.txt"} for i in range(100)]
+    )
+    chat_service.llm = FakeChatModel(latency=args.llm_latency, token_latency=args.token_latency)
+    chat_service.answer_cache = AnswerCache(max_entries=0)  # measure the uncached pipeline
+    runtime = RAGRuntime(vectorstore, version=0)
+    flask_app.get_runtime = lambda: runtime
+    client = flask_app.app.test_client()
+
+    for path in ("/chat", "/chat/stream"):
+        samples = [measure(client, path, "Who has Python experience?") for _ in range(args.requests)]
+        ttfb = statistics.median(s[0] for s in samples)
+        total = statistics.median(s[1] for s in samples)
+        print(f"{path:13} median TTFB: {1000 * ttfb:8.1f} ms   median total: {1000 * total:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""LLM calls and latency for a burst of identical questions, with and without coalescing.
+
+``--burst`` threads ask the same question at once, as when a team clicks
+the same quick question together. The answer cache is disabled, so only
+request coalescing can save LLM calls. Half the burst uses ``/chat`` and
+half ``/chat/stream``.
+
+    python -m benchmarks.bench_coalescing --burst 20 --llm-latency 1.0
+"""
+import time
+import argparse
+import threading
+from benchmarks.fakes import offline_environment, FakeEmbeddings, FakeVectorStore, FakeChatModel, synthetic_resume
+from benchmarks.bench_hnsw_recall import percentile_ms
+
+offline_environment()
+
+from services import chat_service  # noqa: E402
+from services.answer_cache import AnswerCache  # noqa: E402
+from services.runtime import RAGRuntime  # noqa: E402
+from services.single_flight import Flight, SingleFlight  # noqa: E402
+
+
+class NoCoalescing(SingleFlight):
+    """Every caller leads its own flight."""
+
+    def join(self, key):
+        return Flight(), True
+
+
+def burst(runtime, size: int, question: str):
+    """Ask question from size threads released together; returns per-request latencies."""
+    latencies = [0.0] * size
+    start = threading.Barrier(size)
+
+    def ask(i):
+        start.wait()
+        started = time.perf_counter()
+        if i % 2:
+            list(chat_service.stream_chat_question(question, runtime))
+        else:
+            chat_service.process_chat_question(question, runtime)
+        latencies[i] = time.perf_counter() - started
+
+    threads = [threading.Thread(target=ask, args=(i,)) for i in range(size)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--burst", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=1.0)
+    args = parser.parse_args()
+
+    vectorstore = FakeVectorStore.from_texts(
+        [synthetic_resume(i, paragraphs=2) for i in range(200)],
+        FakeEmbeddings(),
+        metadatas=[{"source": f"resume_{i}.txt"} for i in range(200)]
+    )
+    chat_service.answer_cache = AnswerCache(max_entries=0)  # coalescing is the only saving
+    chat_service.llm = FakeChatModel(latency=args.llm_latency)
+    runtime = RAGRuntime(vectorstore, version=0)
+
+    for name, flights in [("without coalescing", NoCoalescing()), ("with coalescing", SingleFlight())]:
+        chat_service.chat_flights = flights
+        chat_service.llm.calls = 0
+        latencies = burst(runtime, args.burst, "Who has Python experience?")
+        print(
+            f"{name:19} LLM calls: {chat_service.llm.calls:3d} for {args.burst} requests  "
+            f"p50 {percentile_ms(latencies, 50):7.0f} ms  p95 {percentile_ms(latencies, 95):7.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""LLM calls saved by the persistent completion cache across re-ingests and workers.
+
+Answers a set of questions three times against the fake OpenAI server:
+once cold, once after a re-ingest (a new index version, so the answer
+cache misses, but the retrieved context is unchanged), and once from a
+second worker process sharing the cache file. Each pass reports the
+chat completion requests that reached the server and the latency per
+question.
+
+    python -m benchmarks.bench_completion_cache --questions 20 --llm-latency 0.5
+"""
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+import subprocess
+from benchmarks.fakes import offline_environment, FakeEmbeddings, FakeVectorStore, synthetic_resume
+from benchmarks.fake_openai_server import FakeOpenAIServer
+from benchmarks.bench_hnsw_recall import percentile_ms
+
+offline_environment()
+
+
+def answer_all(llm_url: str, questions: int, versions):
+    """Answer every question once per index version; returns per-pass (latencies, cache hits, LLM calls)."""
+    from services import chat_service
+    from services.answer_cache import AnswerCache
+    from services.runtime import RAGRuntime
+
+    os.environ["OPENAI_API_BASE"] = llm_url
+    llm = chat_service.get_llm()
+    chat_service.answer_cache = AnswerCache()
+    vectorstore = FakeVectorStore.from_texts(
+        [synthetic_resume(i, paragraphs=2) for i in range(200)],
+        FakeEmbeddings(),
+        metadatas=[{"source": f"resume_{i}.txt"} for i in range(200)]
+    )
+
+    passes = []
+    for version in versions:
+        runtime = RAGRuntime(vectorstore, version=version)
+        latencies, hits, misses = [], llm.cache.hits, llm.cache.misses
+        for i in range(questions):
+            started = time.perf_counter()
+            chat_service.process_chat_question(f"Who has skill number {i}?", runtime)
+            latencies.append(time.perf_counter() - started)
+        passes.append((latencies, llm.cache.hits - hits, llm.cache.misses - misses))
+    return passes, llm.cache.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--worker", nargs=2, metavar=("LLM_URL", "QUESTIONS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        passes, stats = answer_all(args.worker[0], int(args.worker[1]), versions=[0])
+        latencies, hits, calls = passes[0]
+        print(json.dumps({"latencies": latencies, "hits": hits, "calls": calls, "stats": stats}))
+        return
+
+    server = FakeOpenAIServer(chat_latency=args.llm_latency).start()
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ.update({
+            "COMPLETION_CACHE_PATH": os.path.join(directory, "completions.sqlite"),
+            "LLM_TEMPERATURE": "0",
+            "OPENAI_API_KEY": "sk-offline-benchmark",
+        })
+        passes, _ = answer_all(server.url, args.questions, versions=[0, 1])
+        for name, (latencies, hits, calls) in zip(["cold", "after re-ingest"], passes):
+            print(f"{name:17} LLM calls: {calls:3d}  cache hits: {hits:3d}  p50 {percentile_ms(latencies, 50):7.1f} ms")
+
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_completion_cache", "--worker", server.url, str(args.questions)],
+            env=os.environ, capture_output=True, text=True, check=True
+        ).stdout
+        worker = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{'second worker':17} LLM calls: {worker['calls']:3d}  "
+            f"cache hits: {worker['hits']:3d}  p50 {percentile_ms(worker['latencies'], 50):7.1f} ms  "
+            f"saved {worker['stats']['tokens_saved']} tokens, ${worker['stats']['dollars_saved']:.4f}"
+        )
+        print(f"requests that reached the fake OpenAI server: {server.chat_requests}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
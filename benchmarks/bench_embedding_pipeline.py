@@ -0,0 +1,98 @@
+"""Chunks per second of the batched embedding pipeline versus a single add_documents call.
+
+Both runs embed the same chunks through ``OpenAIEmbeddings`` pointed at the
+local fake OpenAI server (simulated latency and tokens-per-minute limit)
+and write them to a throwaway local vector store.
+
+    python -m benchmarks.bench_embedding_pipeline --chunks 2000
+    python -m benchmarks.bench_embedding_pipeline --chunks 1000 --tpm 120000 --concurrency 8
+"""
+import argparse
+import tempfile
+import time
+from benchmarks.fakes import offline_environment, synthetic_resume
+from benchmarks.fake_openai_server import FakeOpenAIServer
+
+offline_environment()
+
+from langchain.schema import Document  # noqa: E402
+from langchain_openai import OpenAIEmbeddings  # noqa: E402
+from services.document_service import _split_documents  # noqa: E402
+from services.embedding_pipeline import embed_and_upsert  # noqa: E402
+from services.local_store import LocalVectorStore  # noqa: E402
+
+
+class BatchedOpenAIEmbeddings(OpenAIEmbeddings):
+    """Sends ``chunk_size`` texts per request, like the tokenized path that needs tiktoken's downloads."""
+
+    def embed_documents(self, texts, chunk_size=0):
+        vectors = []
+        for start in range(0, len(texts), self.chunk_size):
+            response = self.client.create(input=texts[start:start + self.chunk_size], **self._invocation_params)
+            vectors.extend(item.embedding for item in response.data)
+        return vectors
+
+
+def make_chunks(count: int):
+    chunks, i = [], 0
+    while len(chunks) < count:
+        batch = [Document(page_content=synthetic_resume(i + j), metadata={"source": f"resume_{i + j}.txt"}) for j in range(50)]
+        chunks.extend(_split_documents(batch))
+        i += 50
+    return chunks[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.1, help="fixed seconds per embedding request")
+    parser.add_argument("--latency-per-1k-tokens", type=float, default=0.02)
+    parser.add_argument("--tpm", type=float, default=0, help="server tokens-per-minute limit (0: unlimited)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--batch-tokens", type=int, default=8000)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks)
+    texts = [chunk.page_content for chunk in chunks]
+    metadatas = [chunk.metadata for chunk in chunks]
+    ids = [f"chunk-{i}" for i in range(len(chunks))]
+
+    def run(name, fn):
+        server = FakeOpenAIServer(
+            latency=args.latency,
+            latency_per_1k_tokens=args.latency_per_1k_tokens,
+            tokens_per_minute=args.tpm
+        ).start()
+        embeddings = BatchedOpenAIEmbeddings(openai_api_key="sk-fake", openai_api_base=server.url)
+        with tempfile.TemporaryDirectory() as tmp:
+            store = LocalVectorStore(embeddings, tmp)
+            started = time.perf_counter()
+            try:
+                fn(store, embeddings)
+            except Exception as e:
+                server.shutdown()
+                print(f"{name:22} failed after {time.perf_counter() - started:.2f} s with {server.rate_limited} 429s: {type(e).__name__}")
+                return
+            elapsed = time.perf_counter() - started
+            assert store.count() == len(chunks)
+        server.shutdown()
+        print(
+            f"{name:22} {len(chunks) / elapsed:8.1f} chunks/s  {elapsed:6.2f} s  "
+            f"requests: {server.requests:4d}  429s: {server.rate_limited:3d}"
+        )
+
+    run("add_documents", lambda store, embeddings: store.add_documents(chunks, ids=ids))
+    for concurrency in args.concurrency:
+        run(f"pipeline x{concurrency}", lambda store, embeddings: embed_and_upsert(
+            texts, metadatas, ids,
+            embed=embeddings.embed_documents,
+            upsert=store.add_embeddings,
+            concurrency=concurrency,
+            max_batch_tokens=args.batch_tokens,
+            # Leave headroom: the server's budget also refills while requests are in transit
+            tokens_per_minute=0.95 * args.tpm
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Recall@k and latency of the HNSW backend against exact local search.
+
+Builds both indexes over the same clustered synthetic vectors (no embedding
+calls) and sweeps M and efSearch. Chunks of one resume, and of resumes
+for similar roles, embed close together, so vectors are drawn around
+shared centroids with ``--spread`` noise. Queries are drawn around the
+same centroids, like questions about the indexed corpus; queries in
+random directions would have no real nearest neighbours to find.
+
+    python -m benchmarks.bench_hnsw_recall --vectors 100000 --dimension 384 --m 8 16 32
+"""
+import time
+import argparse
+import tempfile
+import numpy as np
+from benchmarks.fakes import FakeEmbeddings, clustered_vectors
+from services.local_store import LocalVectorStore
+from services.hnsw_store import HNSWVectorStore
+
+
+def percentile_ms(samples, q: float) -> float:
+    return 1000 * float(np.percentile(samples, q))
+
+
+def timed_search(store: LocalVectorStore, queries: np.ndarray, k: int):
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append({row_id for row_id, _ in store.search_ids(query, k)})
+        latencies.append(time.perf_counter() - started)
+    return results, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, nargs="+", default=[16])
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--spread", type=float, default=0.35, help="noise around each centroid, relative to its norm")
+    args = parser.parse_args()
+
+    clusters = max(16, args.vectors // 500)
+    vectors = clustered_vectors(args.vectors, args.dimension, clusters, args.spread, seed=1)
+    queries = clustered_vectors(args.queries, args.dimension, clusters, args.spread, seed=2)
+    ids = [f"chunk-{i}" for i in range(args.vectors)]
+    texts = [""] * args.vectors
+    embedding = FakeEmbeddings(dimension=args.dimension)
+
+    with tempfile.TemporaryDirectory() as exact_dir:
+        exact = LocalVectorStore(embedding, exact_dir)
+        exact.add_embeddings(texts, vectors, ids=ids)
+        truth, exact_latencies = timed_search(exact, queries, args.k)
+        print(f"{args.vectors} vectors x {args.dimension} dims, k={args.k}, spread={args.spread}, "
+              f"efConstruction={args.ef_construction}")
+        print(f"{'index':>20} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        print(f"{'exact':>20} {1.0:9.3f} {percentile_ms(exact_latencies, 50):8.2f} {percentile_ms(exact_latencies, 95):8.2f}")
+
+        for m in args.m:
+            with tempfile.TemporaryDirectory() as hnsw_dir:
+                hnsw = HNSWVectorStore(embedding, hnsw_dir, m=m, ef_construction=args.ef_construction)
+                hnsw.add_embeddings(texts, vectors, ids=ids)
+                started = time.perf_counter()
+                hnsw.persist()
+                print(f"M={m}: graph build {time.perf_counter() - started:.1f}s")
+
+                for ef_search in args.ef_search:
+                    hnsw.ef_search = ef_search
+                    found, latencies = timed_search(hnsw, queries, args.k)
+                    recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+                    print(f"{f'hnsw M={m} ef={ef_search}':>20} {recall:9.3f} "
+                          f"{percentile_ms(latencies, 50):8.2f} {percentile_ms(latencies, 95):8.2f}")
+
+if __name__ == "__main__":
+    main()
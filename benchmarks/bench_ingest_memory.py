@@ -0,0 +1,111 @@
+"""Peak Python heap of list-based versus streaming ingestion.
+
+Writes synthetic resumes to a temporary directory and ingests them twice
+under ``tracemalloc``: once the way ``create_vector_store`` used to (load
+every document, split everything, embed everything, then upsert) and once
+through the generator pipeline (``iter_documents`` → ``_iter_chunks`` →
+``embed_and_upsert_stream``). The streaming pipeline then runs again
+feeding a ``BM25Builder``, as ingests do with ``BM25_INDEX`` on (the
+default), once as the builder works now, spooling chunks to disk, and once
+also holding every chunk's text and metadata as it used to. Vectors go to a
+sink that discards them, so only the ingestion path itself is measured.
+Parsing runs in-process because tracemalloc does not see worker processes.
+
+    python -m benchmarks.bench_ingest_memory --files 250 500 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from benchmarks.fakes import offline_environment, FakeEmbeddings, synthetic_resume
+
+offline_environment()
+
+from services.document_service import load_documents, iter_documents, _split_documents, _iter_chunks  # noqa: E402
+from services.embedding_pipeline import embed_and_upsert_stream  # noqa: E402
+from services.bm25_index import BM25Builder  # noqa: E402
+
+
+def write_corpus(directory: str, files: int, paragraphs: int) -> int:
+    size = 0
+    for i in range(files):
+        text = synthetic_resume(i, paragraphs=paragraphs)
+        with open(os.path.join(directory, f"resume_{i:05d}.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+        size += len(text)
+    return size
+
+
+def list_based(path: str, embeddings, sink) -> int:
+    documents = load_documents(path, workers=1)
+    chunks = _split_documents(documents)
+    vectors = embeddings.embed_documents([chunk.page_content for chunk in chunks])
+    for start in range(0, len(chunks), 500):
+        batch = chunks[start:start + 500]
+        sink([c.page_content for c in batch], vectors[start:start + 500], [c.metadata for c in batch], None)
+    return len(chunks)
+
+
+def streaming(path: str, embeddings, sink) -> int:
+    records = (
+        (chunk.page_content, chunk.metadata, str(i))
+        for i, chunk in enumerate(_iter_chunks(iter_documents(path, workers=1)))
+    )
+    stats = embed_and_upsert_stream(records, embeddings.embed_documents, sink, concurrency=4, tokens_per_minute=0)
+    return stats["chunks"]
+
+
+def streaming_bm25(path: str, embeddings, sink, keep_texts: bool = False) -> int:
+    """Streaming ingest that also builds a BM25 index; keep_texts holds chunk text and metadata like the old builder."""
+    kept = []
+    with tempfile.TemporaryDirectory() as index_dir:
+        builder = BM25Builder(os.path.join(index_dir, "bm25"))
+
+        def records():
+            for i, chunk in enumerate(_iter_chunks(iter_documents(path, workers=1))):
+                builder.add(str(i), chunk.page_content, chunk.metadata)
+                if keep_texts:
+                    kept.append((chunk.page_content, chunk.metadata))
+                yield chunk.page_content, chunk.metadata, str(i)
+
+        stats = embed_and_upsert_stream(records(), embeddings.embed_documents, sink, concurrency=4, tokens_per_minute=0)
+        builder.build()
+    return stats["chunks"]
+
+
+def measure(fn, path: str):
+    embeddings = FakeEmbeddings()
+    tracemalloc.start()
+    started = time.perf_counter()
+    chunks = fn(path, embeddings, lambda texts, vectors, metadatas, ids: None)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return chunks, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, nargs="+", default=[250, 500, 1000])
+    parser.add_argument("--paragraphs", type=int, default=40)
+    args = parser.parse_args()
+
+    for files in args.files:
+        with tempfile.TemporaryDirectory() as path:
+            size = write_corpus(path, files, args.paragraphs)
+            print(f"{files} files, {size / 2 ** 20:.1f} MiB of text")
+            variants = [
+                ("list-based", list_based),
+                ("streaming", streaming),
+                ("streaming + BM25, texts in memory", partial(streaming_bm25, keep_texts=True)),
+                ("streaming + BM25", streaming_bm25),
+            ]
+            for name, fn in variants:
+                chunks, peak, elapsed = measure(fn, path)
+                print(f"  {name:34} chunks: {chunks:6d}  peak heap: {peak / 2 ** 20:7.1f} MiB  time: {elapsed:6.2f} s")
+
+
+if __name__ == "__main__":
+    main()
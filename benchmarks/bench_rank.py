@@ -0,0 +1,79 @@
+"""Latency of vectorized candidate ranking versus a per-candidate Python loop.
+
+Fills a local store with synthetic chunk vectors for many candidates (no
+embedding calls) and ranks random job-description vectors with each
+pooling mode. Job descriptions are drawn around the same clusters as
+the chunks. The baseline scores each candidate's chunks separately, the
+way a loop over ``similarity_search`` results per resume would.
+
+    python -m benchmarks.bench_rank --candidates 5000 --chunks-per-candidate 12
+"""
+import time
+import argparse
+import tempfile
+import numpy as np
+from benchmarks.fakes import FakeEmbeddings, clustered_vectors
+from benchmarks.bench_hnsw_recall import percentile_ms
+from services.local_store import LocalVectorStore
+from services.ranking import CandidateRanker, POOLING_MODES
+
+
+def loop_rank(store: LocalVectorStore, query: np.ndarray, top_n: int):
+    matrix, alive, _, metadatas = store.matrix_view()
+    rows_by_source = {}
+    for row in np.flatnonzero(alive):
+        rows_by_source.setdefault(metadatas[row]["source"], []).append(row)
+    scores = {source: max(float(matrix[row] @ query) for row in rows) for source, rows in rows_by_source.items()}
+    return sorted(scores, key=scores.get, reverse=True)[:top_n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=5000)
+    parser.add_argument("--chunks-per-candidate", type=int, default=12)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-n", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    counts = rng.integers(1, 2 * args.chunks_per_candidate, args.candidates)
+    vectors = clustered_vectors(int(counts.sum()), args.dimension, clusters=50, spread=0.6, seed=0)
+    sources = np.repeat([f"resumes/candidate_{i:05d}.pdf" for i in range(args.candidates)], counts)
+    queries = clustered_vectors(args.queries, args.dimension, clusters=50, spread=0.6, seed=2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LocalVectorStore(FakeEmbeddings(args.dimension), tmp)
+        for start in range(0, len(vectors), 10_000):
+            end = min(start + 10_000, len(vectors))
+            store.add_embeddings(
+                [f"chunk {i}" for i in range(start, end)],
+                vectors[start:end],
+                [{"source": source} for source in sources[start:end]],
+                [str(i) for i in range(start, end)]
+            )
+        print(f"{args.candidates} candidates, {len(vectors)} chunks, dimension {args.dimension}")
+
+        started = time.perf_counter()
+        ranker = CandidateRanker(store)
+        print(f"  ranker build: {1000 * (time.perf_counter() - started):.1f} ms")
+
+        for pooling in POOLING_MODES:
+            latencies = []
+            for query in queries:
+                started = time.perf_counter()
+                ranker.rank(query, top_n=args.top_n, pooling=pooling)
+                latencies.append(time.perf_counter() - started)
+            print(f"  {pooling:6} p50: {percentile_ms(latencies, 50):7.2f} ms  p95: {percentile_ms(latencies, 95):7.2f} ms")
+
+        latencies = []
+        for query in queries[:5]:
+            started = time.perf_counter()
+            expected = loop_rank(store, query, args.top_n)
+            latencies.append(time.perf_counter() - started)
+            assert expected == [c["source"] for c in ranker.rank(query, top_n=args.top_n, pooling="max")]
+        print(f"  loop   p50: {percentile_ms(latencies, 50):7.2f} ms  (max pooling, same shortlist)")
+
+
+if __name__ == "__main__":
+    main()
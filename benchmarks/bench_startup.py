@@ -0,0 +1,138 @@
+"""Import time of the application entry points, measured in fresh interpreters.
+
+Each target is imported ``--runs`` times in a new ``python -X importtime``
+process. The benchmark reports the median wall time, the cumulative
+import time of the target module, and which heavy libraries were imported
+during startup, with their cumulative import time: the OpenAI and Pinecone clients, the langchain document
+loaders and text splitters, and langchain/langchain_core themselves. The
+last two are still imported eagerly, because the vector stores,
+retrievers and caches subclass their base classes. ``OPENAI_API_KEY`` is
+removed from the environment, so an import that still builds an OpenAI
+client fails.
+
+``--baseline REV`` also measures the same targets in a ``git archive`` of
+another revision, with a placeholder ``OPENAI_API_KEY`` for trees that
+build clients at import time, and prints the change against it:
+
+    python -m benchmarks.bench_startup --runs 5 --baseline <commit before lazy clients>
+"""
+import os
+import re
+import sys
+import time
+import tarfile
+import argparse
+import tempfile
+import statistics
+import subprocess
+from typing import Dict, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = ["app", "asgi_app", "debug"]
+HEAVY_MODULES = [
+    "langchain_openai", "openai", "pinecone", "langchain_pinecone", "langchain_community", "langchain_text_splitters",
+    "langchain", "langchain_core",
+]
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_once(target: str, env: dict, root: str = ROOT):
+    """Import target in a fresh interpreter.
+
+    Returns (wall seconds, {module: cumulative us}, {package: us}, error).
+    A package's time sums its outermost modules, wherever in the import
+    tree they were first imported, so ``langchain`` counts
+    ``langchain.schema`` pulled in by ``services.document_service``.
+    """
+    started = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=root, env=env, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - started
+    entries = []
+    for line in process.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            entries.append((len(match.group(3)) // 2, match.group(4), int(match.group(2))))
+    modules = {name: us for _, name, us in entries}
+
+    # importtime prints children before their parent, so walking backwards visits ancestors first
+    packages, ancestors = {}, []
+    for depth, name, us in reversed(entries):
+        del ancestors[depth:]
+        package = name.split(".")[0]
+        if not any(ancestor.split(".")[0] == package for ancestor in ancestors):
+            packages[package] = packages.get(package, 0) + us
+        ancestors.append(name)
+    error = process.stderr.strip().splitlines()[-1] if process.returncode else None
+    return elapsed, modules, packages, error
+
+
+def measure(target: str, runs: int, env: dict, root: str = ROOT) -> Dict:
+    """Median wall and cumulative import seconds of target, with the package times of the last run."""
+    walls, cumulative, packages = [], [], {}
+    for _ in range(runs):
+        wall, modules, packages, error = import_once(target, env, root)
+        if error:
+            return {"error": error}
+        walls.append(wall)
+        cumulative.append(modules.get(target, 0) / 1e6)
+    return {"wall": statistics.median(walls), "import": statistics.median(cumulative), "packages": packages}
+
+
+def checkout(revision: str, directory: str) -> str:
+    """Extract revision of this repository into directory."""
+    archive = subprocess.run(["git", "archive", revision], cwd=ROOT, capture_output=True, check=True).stdout
+    with tempfile.TemporaryFile() as f:
+        f.write(archive)
+        f.seek(0)
+        with tarfile.open(fileobj=f) as tar:
+            tar.extractall(directory)
+    return directory
+
+
+def report(name: str, result: Dict, top: int, baseline: Optional[Dict] = None) -> None:
+    if "error" in result:
+        print(f"{name:20} import failed: {result['error']}")
+        return
+    packages = result["packages"]
+    heavy = [f"{module} {packages[module] / 1000:.0f} ms" for module in HEAVY_MODULES if module in packages]
+    line = (
+        f"{name:20} wall p50 {1000 * result['wall']:7.0f} ms  import {1000 * result['import']:7.0f} ms  "
+        f"heavy modules: {', '.join(heavy) or 'none'}"
+    )
+    if baseline and "error" not in baseline:
+        line += f"  ({1000 * (result['wall'] - baseline['wall']):+.0f} ms wall vs baseline)"
+    print(line)
+    target = name.split()[0]
+    top_level = sorted(((us, package) for package, us in packages.items() if package != target), reverse=True)
+    for us, module in top_level[:top]:
+        print(f"    {module:28} {us / 1000:7.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--targets", nargs="+", default=TARGETS)
+    parser.add_argument("--top", type=int, default=8, help="slowest packages to list")
+    parser.add_argument("--baseline", metavar="REV", help="git revision to measure the same targets in")
+    args = parser.parse_args()
+
+    env = {key: value for key, value in os.environ.items() if key != "OPENAI_API_KEY"}
+    env.update({"PINECONE_API_KEY": "offline-benchmark", "INDEX_NAME": "offline-benchmark"})
+
+    with tempfile.TemporaryDirectory() as directory:
+        baseline_root = checkout(args.baseline, directory) if args.baseline else None
+        for target in args.targets:
+            baseline = None
+            if baseline_root:
+                baseline_env = {**env, "OPENAI_API_KEY": "sk-offline-benchmark"}
+                baseline = measure(target, args.runs, baseline_env, baseline_root)
+                report(f"{target} @ {args.baseline}", baseline, args.top)
+            report(target, measure(target, args.runs, env), args.top, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Offline benchmark suite for the ingest and query paths, with JSON results.
+
+Writes synthetic resume corpora, then for each size measures
+``load_documents``, splitting, ``create_vector_store`` and
+``process_chat_question`` against a local vector store, deterministic
+fake embeddings and a fake chat model with ``--llm-latency`` seconds of
+latency. No network access or API keys are needed. Each stage reports
+throughput and p50/p95/p99 latency per unit of work: per file for
+loading, per document for splitting, per embedding batch for
+``create_vector_store`` and per question for chat.
+
+Results are printed and written to ``--output`` as JSON together with the
+commit and configuration, so runs can be compared across commits:
+
+    python -m benchmarks.bench_suite --files 1000 10000 --output before.json
+    python -m benchmarks.bench_suite --files 1000 10000 --output after.json --compare before.json
+"""
+import os
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+from typing import Dict, List, Optional
+import numpy as np
+from benchmarks.fakes import offline_environment, FakeEmbeddings, FakeChatModel
+from benchmarks.bench_ingest_memory import write_corpus
+
+offline_environment()
+# Everything stays on local disk: no Pinecone, no embedding or answer cache, no rate limit
+os.environ.update({
+    "VECTOR_STORE_BACKEND": "local",
+    "EMBEDDING_CACHE_PATH": "",
+    "ANSWER_CACHE_SIZE": "0",
+    "EMBED_TOKENS_PER_MINUTE": "0",
+})
+os.environ.pop("LOCAL_INDEX_DIR", None)
+
+from services import chat_service, document_service  # noqa: E402
+from services.document_service import (  # noqa: E402
+    load_documents, iter_documents, iter_parsed_files, discover_files, create_vector_store, _iter_chunks,
+    get_vector_store, get_keyword_index, get_ranking_store, get_candidate_index, get_index_version
+)
+from services.runtime import RAGRuntime  # noqa: E402
+
+QUESTIONS = [
+    "Who has Python experience?",
+    "Which candidates know Kubernetes and AWS?",
+    "Who has mentored engineers?",
+    "Compare candidates with Payroll and Excel skills",
+    "Which candidates have more than 10 years of Terraform?",
+]
+
+
+class TimedEmbeddings(FakeEmbeddings):
+    """Fake embeddings that record how long each ``embed_documents`` batch took."""
+
+    def __init__(self, dimension: int = 256):
+        super().__init__(dimension)
+        self.batch_seconds: List[float] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        started = time.perf_counter()
+        vectors = super().embed_documents(texts)
+        self.batch_seconds.append(time.perf_counter() - started)
+        return vectors
+
+
+def summarize(latencies: List[float], latency_unit: str, items: int, unit: str, elapsed: float) -> Dict[str, float]:
+    """Throughput in items per second over the whole stage and latency percentiles per latency_unit."""
+    samples = np.asarray(latencies) * 1000 if latencies else np.zeros(1)
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        "unit": unit,
+        "items": items,
+        "latency_unit": latency_unit,
+        "seconds": round(elapsed, 4),
+        "throughput_per_s": round(items / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+    }
+
+
+def bench_load(path: str, workers: int) -> Dict[str, float]:
+    latencies = []
+    started = last = time.perf_counter()
+    for _ in iter_parsed_files(discover_files(path), workers):
+        now = time.perf_counter()
+        latencies.append(now - last)
+        last = now
+    result = summarize(latencies, "file", len(latencies), "file", time.perf_counter() - started)
+    # The list-returning entry point, for the end-to-end number
+    started = time.perf_counter()
+    documents = load_documents(path, workers)
+    result["load_documents_seconds"] = round(time.perf_counter() - started, 4)
+    result["documents"] = len(documents)
+    return result
+
+
+def bench_split(path: str) -> Dict[str, float]:
+    documents = load_documents(path, workers=1)
+    latencies, chunks = [], 0
+    started = time.perf_counter()
+    for document in documents:
+        begun = time.perf_counter()
+        chunks += sum(1 for _ in _iter_chunks([document]))
+        latencies.append(time.perf_counter() - begun)
+    result = summarize(latencies, "document", len(documents), "document", time.perf_counter() - started)
+    result["chunks"] = chunks
+    return result
+
+
+def bench_create(path: str, workers: int, embeddings: TimedEmbeddings) -> Dict[str, float]:
+    embeddings.batch_seconds.clear()
+    texts = embeddings.texts_embedded
+    started = time.perf_counter()
+    if create_vector_store(iter_documents(path, workers)) is None:
+        raise RuntimeError("create_vector_store failed; see the log")
+    elapsed = time.perf_counter() - started
+    chunks = embeddings.texts_embedded - texts
+    result = summarize(embeddings.batch_seconds, "embedding batch", chunks, "chunk", elapsed)
+    result["batches"] = len(embeddings.batch_seconds)
+    return result
+
+
+def bench_chat(questions: int, retriever: str) -> Dict[str, float]:
+    runtime = RAGRuntime(
+        get_vector_store(),
+        get_index_version(),
+        keyword_index=get_keyword_index(),
+        ranking_store=get_ranking_store(),
+        candidate_index=get_candidate_index()
+    )
+    mode = runtime.resolve_mode(retriever)
+    chat_service.process_chat_question(QUESTIONS[0], runtime, retriever_mode=mode)  # warm-up
+    latencies = []
+    started = time.perf_counter()
+    for i in range(questions):
+        begun = time.perf_counter()
+        result = chat_service.process_chat_question(f"{QUESTIONS[i % len(QUESTIONS)]} ({i})", runtime, mode)
+        if "error" in result:
+            raise RuntimeError(f"process_chat_question failed: {result['error']}")
+        latencies.append(time.perf_counter() - begun)
+    result = summarize(latencies, "question", questions, "question", time.perf_counter() - started)
+    result["retriever"] = mode
+    return result
+
+
+def run(files: int, args) -> Dict[str, Dict[str, float]]:
+    with tempfile.TemporaryDirectory() as corpus, tempfile.TemporaryDirectory() as state_dir:
+        os.environ["INDEX_STATE_DIR"] = state_dir
+        size = write_corpus(corpus, files, args.paragraphs)
+        print(f"{files} files, {size / 2 ** 20:.1f} MiB of text")
+
+        embeddings = TimedEmbeddings(args.dimension)
+        document_service.embeddings = embeddings
+        chat_service.llm = FakeChatModel(latency=args.llm_latency)
+
+        stages = {
+            "load_documents": bench_load(corpus, args.workers),
+            "split": bench_split(corpus),
+            "create_vector_store": bench_create(corpus, args.workers, embeddings),
+            "process_chat_question": bench_chat(args.questions, args.retriever),
+        }
+        for name, result in stages.items():
+            print(
+                f"  {name:22} {result['throughput_per_s']:10.1f} {result['unit']}s/s"
+                f"  p50 {result['p50_ms']:9.3f} ms  p95 {result['p95_ms']:9.3f} ms  p99 {result['p99_ms']:9.3f} ms"
+                f" per {result['latency_unit']}"
+            )
+        return {"files": files, "bytes": size, "stages": stages}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True
+        )
+        return output.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict, baseline: Dict) -> None:
+    """Print throughput and p95 changes against a previous run, for corpus sizes present in both."""
+    previous = {run["files"]: run["stages"] for run in baseline["runs"]}
+    print(f"\nversus {baseline.get('commit') or 'baseline'}:")
+    for run in current["runs"]:
+        if run["files"] not in previous:
+            continue
+        print(f"  {run['files']} files")
+        for name, result in run["stages"].items():
+            before = previous[run["files"]].get(name)
+            if not before or not before["throughput_per_s"] or not before["p95_ms"]:
+                continue
+            throughput = 100 * (result["throughput_per_s"] / before["throughput_per_s"] - 1)
+            p95 = 100 * (result["p95_ms"] / before["p95_ms"] - 1)
+            print(f"    {name:22} throughput {throughput:+7.1f}%  p95 {p95:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--paragraphs", type=int, default=6, help="paragraphs per synthetic resume")
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--retriever", default="vector", help="retriever mode for the chat questions")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds the fake LLM takes per answer")
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=1, help="parser processes (INGEST_WORKERS)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "runs": [run(files, args) for files in args.files],
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nwrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Local stand-in for the OpenAI embeddings and chat completions APIs.
+
+Serves ``POST /v1/embeddings`` with deterministic vectors after a simulated
+latency, and enforces a tokens-per-minute budget with 429 responses (and a
+Retry-After header) the way the real API does. ``POST /v1/chat/completions``
+answers with a canned markdown reply after ``chat_latency`` seconds,
+streamed word by word when the request asks for ``stream``. Point
+``OpenAIEmbeddings`` or ``ChatOpenAI`` at it with ``openai_api_base=server.url``.
+
+    python -m benchmarks.fake_openai_server --port 8089 --tpm 200000
+"""
+import argparse
+import base64
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the simulated limits and request counters."""
+
+    daemon_threads = True
+
+    request_queue_size = 1024
+    answer = "## Summary\nOffline benchmark answer.\n\n## Key Insights\n- Candidate has Python experience"
+
+    def __init__(self, port: int = 0, latency: float = 0.1, latency_per_1k_tokens: float = 0.02,
+                 tokens_per_minute: float = 0, dimension: int = 1536, chat_latency: float = 1.0,
+                 token_latency: float = 0.0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.chat_latency = chat_latency
+        self.token_latency = token_latency
+        self.chat_requests = 0
+        self.latency_per_1k_tokens = latency_per_1k_tokens
+        self.tokens_per_minute = tokens_per_minute
+        self.dimension = dimension
+        self.requests = 0
+        self.rate_limited = 0
+        self.tokens = 0
+        self._budget = tokens_per_minute
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def admit(self, tokens: int):
+        """Charge tokens against the per-minute budget; return seconds to wait if over it."""
+        with self._lock:
+            self.requests += 1
+            if self.tokens_per_minute:
+                now = time.monotonic()
+                rate = self.tokens_per_minute / 60.0
+                self._budget = min(self.tokens_per_minute, self._budget + (now - self._updated) * rate)
+                self._updated = now
+                if tokens > self._budget:
+                    self.rate_limited += 1
+                    return (tokens - self._budget) / rate
+                self._budget -= tokens
+            self.tokens += tokens
+            return None
+
+    def vector(self, item) -> np.ndarray:
+        seed = int.from_bytes(hashlib.sha256(json.dumps(item).encode()).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimension).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeOpenAIServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.path.rstrip("/") == "/v1/chat/completions":
+            return self._chat(body)
+        if self.path.rstrip("/") != "/v1/embeddings":
+            return self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+        inputs = body.get("input", [])
+        inputs = inputs if isinstance(inputs, list) and inputs and not isinstance(inputs[0], int) else [inputs]
+        tokens = sum(len(item) if isinstance(item, list) else len(item) // 4 + 1 for item in inputs)
+
+        retry_after = self.server.admit(tokens)
+        if retry_after is not None:
+            error = {"error": {"message": "Rate limit reached for tokens per min", "type": "tokens", "code": "rate_limit_exceeded"}}
+            return self._send(429, error, {"retry-after": f"{retry_after:.3f}"})
+
+        time.sleep(self.server.latency + self.server.latency_per_1k_tokens * tokens / 1000)
+        data = []
+        for i, item in enumerate(inputs):
+            vector = self.server.vector(item)
+            embedding = base64.b64encode(vector.tobytes()).decode() if body.get("encoding_format") == "base64" else vector.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        self._send(200, {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "text-embedding-ada-002"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        })
+
+    def _chat(self, body: dict):
+        with self.server._lock:
+            self.server.chat_requests += 1
+        time.sleep(self.server.chat_latency)
+        model = body.get("model", "gpt-3.5-turbo")
+        base = {"id": "chatcmpl-fake", "created": int(time.time()), "model": model}
+        if not body.get("stream"):
+            return self._send(200, {
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": self.server.answer}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        words = self.server.answer.split(" ")
+        for i, word in enumerate(words):
+            delta = {"role": "assistant", "content": word} if i == 0 else {"content": " " + word}
+            self._event({**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            time.sleep(self.server.token_latency)
+        self._event({**base, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _event(self, payload: dict):
+        self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode())
+        self.wfile.flush()
+
+    def _send(self, status: int, payload: dict, headers: dict = None):
+        content = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--tpm", type=float, default=0, help="tokens per minute before 429s (0: unlimited)")
+    parser.add_argument("--chat-latency", type=float, default=1.0, help="seconds before a chat completion answers")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.port, latency=args.latency, tokens_per_minute=args.tpm, chat_latency=args.chat_latency)
+    print(f"Fake OpenAI API on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Offline stand-ins for OpenAI and Pinecone used by the benchmarks."""
+import os
+import re
+import math
+import time
+import random
+import hashlib
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from langchain.schema import Document
+from langchain.schema.messages import AIMessageChunk
+from langchain.schema.output import ChatGenerationChunk
+from langchain.schema.embeddings import Embeddings
+from langchain.schema.vectorstore import VectorStore
+from langchain.chat_models.base import SimpleChatModel
+
+
+def offline_environment() -> None:
+    """Provide placeholder credentials so the services import without network access."""
+    os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+    os.environ.setdefault("PINECONE_API_KEY", "offline-benchmark")
+    os.environ.setdefault("INDEX_NAME", "offline-benchmark")
+    os.environ["LANGCHAIN_TRACING_V2"] = "false"
+
+
+def clustered_vectors(
+    count: int,
+    dimension: int,
+    clusters: int,
+    spread: float = 0.35,
+    seed: int = 0,
+    centroid_seed: int = 0
+) -> np.ndarray:
+    """Unit float32 vectors drawn around random centroids, closer to real embeddings than uniform noise.
+    
+    The centroids depend only on ``centroid_seed``, so corpus vectors and
+    queries drawn with different ``seed`` values share the same clusters.
+    """
+    centroids = np.random.default_rng(centroid_seed).standard_normal((clusters, dimension)).astype(np.float32)
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal((count, dimension)).astype(np.float32)
+    vectors = centroids[rng.integers(0, clusters, count)] + spread * noise
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic hash-seeded embeddings that count calls."""
+
+    def __init__(self, dimension: int = 256):
+        self.dimension = dimension
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        vector = [rng.gauss(0.0, 1.0) for _ in range(self.dimension)]
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        self.texts_embedded += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        self.texts_embedded += 1
+        return self._vector(text)
+
+
+class FakeVectorStore(VectorStore):
+    """Brute-force in-memory vector store that counts searches."""
+
+    def __init__(self, embedding: Embeddings):
+        self._embedding = embedding
+        self._rows: List[Tuple[List[float], Document]] = []
+        self.searches = 0
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        vectors = self._embedding.embed_documents(texts)
+        start = len(self._rows)
+        for vector, text, metadata in zip(vectors, texts, metadatas):
+            self._rows.append((vector, Document(page_content=text, metadata=metadata)))
+        return [str(i) for i in range(start, len(self._rows))]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k=k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        self.searches += 1
+        scored = sorted(
+            self._rows,
+            key=lambda row: sum(a * b for a, b in zip(row[0], embedding)),
+            reverse=True
+        )
+        return [doc for _, doc in scored[:k]]
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, **kwargs: Any) -> "FakeVectorStore":
+        store = cls(embedding)
+        store.add_texts(texts, metadatas)
+        return store
+
+
+class FakeChatModel(SimpleChatModel):
+    """Chat model returning a canned markdown answer.
+
+    ``latency`` is paid before the first token and ``token_latency`` between
+    streamed tokens, so a full answer takes roughly
+    ``latency + tokens * token_latency``.
+    """
+
+    response: str = "## Summary\nOffline benchmark answer.\n\n## Key Insights\n- Candidate has Python experience"
+    latency: float = 0.0
+    token_latency: float = 0.0
+    calls: int = 0
+
+    def _tokens(self) -> List[str]:
+        return re.findall(r"\S+\s*", self.response)
+
+    def _call(self, messages, stop=None, run_manager=None, **kwargs: Any) -> str:
+        self.calls += 1
+        time.sleep(self.latency + self.token_latency * len(self._tokens()))
+        return self.response
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self.calls += 1
+        time.sleep(self.latency)
+        for token in self._tokens():
+            time.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+
+SKILLS = [
+    "Python", "Java", "Kubernetes", "AWS", "React", "SQL", "CPA", "Payroll",
+    "Recruiting", "Terraform", "Go", "Excel", "Salesforce", "Docker", "Figma"
+]
+
+
+def synthetic_resume(index: int, paragraphs: int = 6) -> str:
+    """Build a deterministic plain-text resume for candidate number ``index``."""
+    rng = random.Random(index)
+    lines = [f"Candidate {index:06d}", f"Email: candidate{index}@example.com", ""]
+    for p in range(paragraphs):
+        skills = ", ".join(rng.sample(SKILLS, 4))
+        years = rng.randint(1, 15)
+        lines.append(
+            f"Role {p + 1}: {years} years working with {skills}. "
+            f"Delivered projects for team {rng.randint(1, 99)} and mentored {rng.randint(0, 8)} engineers. "
+            "Responsible for hiring, planning, stakeholder communication and process improvement."
+        )
+        lines.append("")
+    return "\n".join(lines)
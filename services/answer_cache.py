@@ -0,0 +1,166 @@
+"""Cache of chat answers keyed by normalized question and index version."""
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(question: str) -> str:
+    """Case- and whitespace-insensitive form of a question, without trailing punctuation."""
+    return re.sub(r"\s+", " ", question.lower()).strip(" ?!.")
+
+
+class AnswerCache:
+    """In-process LRU cache of chat responses with a TTL.
+
+    The exact tier matches ``(index version, normalized question)``. When
+    ``semantic_threshold`` is set, a miss falls back to the semantic tier:
+    the cached question of the same index version whose embedding is most
+    similar to the new one is served if the cosine similarity reaches the
+    threshold. Entries for other index versions are never served, and
+    ``clear`` drops everything after an ingest.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600, semantic_threshold: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.semantic_threshold = semantic_threshold
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[Any, str], Tuple[float, Dict[str, Any], Optional[np.ndarray]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @property
+    def semantic(self) -> bool:
+        return self.enabled and self.semantic_threshold is not None
+
+    def get(
+        self,
+        question: str,
+        version: Any,
+        embed: Optional[Callable[[str], List[float]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Return a cached response, or None.
+
+        ``embed`` is only called on an exact-tier miss when the semantic tier is enabled.
+        """
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        cached = self._get_exact(question, version, now)
+        if cached is not None:
+            return cached
+        if self.semantic and embed is not None:
+            cached = self._get_semantic(question, version, embed(question), now)
+            if cached is not None:
+                return cached
+        self._count_miss()
+        return None
+
+    async def aget(
+        self,
+        question: str,
+        version: Any,
+        aembed: Optional[Callable[[str], Awaitable[List[float]]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Async ``get``: ``aembed`` is only awaited on an exact-tier miss when the semantic tier is enabled."""
+        if not self.enabled:
+            return None
+        now = time.monotonic()
+        cached = self._get_exact(question, version, now)
+        if cached is not None:
+            return cached
+        if self.semantic and aembed is not None:
+            cached = self._get_semantic(question, version, await aembed(question), now)
+            if cached is not None:
+                return cached
+        self._count_miss()
+        return None
+
+    def put(
+        self,
+        question: str,
+        version: Any,
+        response: Dict[str, Any],
+        embed: Optional[Callable[[str], List[float]]] = None
+    ) -> None:
+        """Cache a response, evicting the least recently used entries beyond max_entries."""
+        if not self.enabled:
+            return
+        vector = _unit(embed(question)) if self.semantic and embed is not None else None
+        with self._lock:
+            key = (version, normalize_question(question))
+            self._entries[key] = (time.monotonic(), response, vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Invalidate every entry (called after each ingest)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses
+            }
+
+    def _get_exact(self, question: str, version: Any, now: float) -> Optional[Dict[str, Any]]:
+        key = (version, normalize_question(question))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        return None
+
+    def _get_semantic(self, question: str, version: Any, vector: List[float], now: float) -> Optional[Dict[str, Any]]:
+        query = _unit(vector)
+        with self._lock:
+            match = self._nearest(version, query, now)
+            if match is None:
+                return None
+            self._entries.move_to_end(match)
+            self.semantic_hits += 1
+            response = self._entries[match][1]
+        logger.info(f"Semantic answer cache hit: {question!r} ~ {match[1]!r}")
+        return response
+
+    def _count_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def _nearest(self, version: Any, query: np.ndarray, now: float) -> Optional[Tuple[Any, str]]:
+        """Most similar live entry of the same version above the threshold (caller holds the lock)."""
+        keys, vectors = [], []
+        for key, (created, _, vector) in self._entries.items():
+            if key[0] == version and vector is not None and now - created <= self.ttl:
+                keys.append(key)
+                vectors.append(vector)
+        if not keys:
+            return None
+
+        scores = np.stack(vectors) @ query
+        best = int(np.argmax(scores))
+        return keys[best] if scores[best] >= self.semantic_threshold else None
+
+
+def _unit(vector: List[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm else array
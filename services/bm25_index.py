@@ -0,0 +1,234 @@
+"""In-memory BM25 keyword index over chunks, stored as CSR numpy arrays."""
+import os
+import re
+import json
+import mmap
+import shutil
+import logging
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i in is it its me of on or our "
+    "that the their them there these they this to was we were what when where which who whom why "
+    "will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric terms (keeping ``c++`` and ``c#``) without stopwords."""
+    return [term for term in _TOKEN.findall(text.lower()) if term not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of chunks.
+
+    Postings are term-major CSR arrays: the documents containing term ``t``
+    are ``postings[indptr[t]:indptr[t + 1]]`` with matching term frequencies
+    in ``frequencies``. A query gathers the postings of its terms and scores
+    them in one ``bincount``. Chunk text and metadata stay on disk in
+    ``docs.jsonl``, memory-mapped, and only the hits are read back as
+    documents. Indexes are immutable; ``BM25Builder`` writes a new one
+    after an ingest.
+    """
+
+    TERMS_FILE = "terms.json"
+    ARRAYS_FILE = "postings.npz"
+    DOCS_FILE = "docs.jsonl"
+
+    def __init__(
+        self,
+        terms: List[str],
+        indptr: np.ndarray,
+        postings: np.ndarray,
+        frequencies: np.ndarray,
+        doc_lengths: np.ndarray,
+        ids: np.ndarray,
+        docs,
+        offsets: np.ndarray,
+        k1: float = 1.5,
+        b: float = 0.75
+    ):
+        self.terms = terms
+        self.vocab: Dict[str, int] = {term: i for i, term in enumerate(terms)}
+        self.indptr = indptr
+        self.postings = postings
+        self.frequencies = frequencies
+        self.doc_lengths = doc_lengths
+        self.ids = ids
+        self.docs = docs  # docs.jsonl contents; row i is docs[offsets[i]:offsets[i + 1]]
+        self.offsets = offsets
+        self.k1 = k1
+        self.b = b
+        self.avg_doc_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    def __repr__(self) -> str:
+        return f"BM25Index(docs={len(self.ids)}, terms={len(self.terms)}, postings={len(self.postings)})"
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[Document, float]]:
+        """Top-k chunks by BM25 score; chunks sharing no term with the query are not returned."""
+        term_ids = np.array(sorted({self.vocab[t] for t in tokenize(query) if t in self.vocab}), dtype=np.int64)
+        if not len(term_ids) or not len(self.ids):
+            return []
+
+        starts, ends = self.indptr[term_ids], self.indptr[term_ids + 1]
+        df = (ends - starts).astype(np.float64)
+        idf = np.log(1.0 + (len(self.ids) - df + 0.5) / (df + 0.5))
+        docs = np.concatenate([self.postings[s:e] for s, e in zip(starts, ends)])
+        tf = np.concatenate([self.frequencies[s:e] for s, e in zip(starts, ends)]).astype(np.float64)
+
+        norm = tf + self.k1 * (1.0 - self.b + self.b * self.doc_lengths[docs] / self.avg_doc_length)
+        weights = np.repeat(idf, (ends - starts)) * tf * (self.k1 + 1.0) / norm
+        scores = np.bincount(docs, weights=weights, minlength=len(self.ids))
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(self.document(row), float(scores[row])) for row in matched]
+
+    def document(self, row: int) -> Document:
+        doc = json.loads(self.docs[self.offsets[row]:self.offsets[row + 1]])
+        return Document(page_content=doc["text"], metadata=doc["metadata"])
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["BM25Index"]:
+        """Load an index written by ``BM25Builder``, or None if there is none."""
+        try:
+            with open(os.path.join(directory, cls.TERMS_FILE), encoding="utf-8") as f:
+                terms = json.load(f)
+            arrays = np.load(os.path.join(directory, cls.ARRAYS_FILE))
+            with open(os.path.join(directory, cls.DOCS_FILE), "rb") as f:
+                # The mapping outlives the file being replaced by the next build
+                docs = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+            return cls(
+                terms, arrays["indptr"], arrays["postings"], arrays["frequencies"], arrays["doc_lengths"],
+                arrays["ids"], docs, arrays["offsets"]
+            )
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable BM25 index in {directory}: {e}")
+            return None
+
+
+class BM25Builder:
+    """Writes a new ``BM25Index`` to directory.
+
+    Starts from the chunks of ``base``, minus any IDs passed to ``remove``, so
+    an incremental ingest only tokenizes the chunks it adds. Added chunks are
+    spooled to disk as they arrive; only their IDs and the term occurrences,
+    as compact ``(doc, term, frequency)`` columns, stay in memory until
+    ``build`` sorts them into CSR postings.
+    """
+
+    SPOOL_FILE = "added.jsonl"
+
+    def __init__(self, directory: str, base: Optional[BM25Index] = None):
+        self.directory = directory
+        self.base = base
+        self.terms: List[str] = list(base.terms) if base else []
+        self.vocab: Dict[str, int] = dict(base.vocab) if base else {}
+        self.ids: List[str] = []
+        self._removed: set = set()
+        self._lengths = array("q")
+        self._docs = array("i")
+        self._term_ids = array("i")
+        self._frequencies = array("i")
+
+        self._staging = f"{directory}.tmp"
+        shutil.rmtree(self._staging, ignore_errors=True)
+        os.makedirs(self._staging)
+        self._spool = open(os.path.join(self._staging, self.SPOOL_FILE), "wb")
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """Leave these chunks of the base index out of the new index."""
+        self._removed.update(ids)
+
+    def add(self, chunk_id: str, text: str, metadata: dict) -> None:
+        row = len(self.ids)
+        self.ids.append(chunk_id)
+        line = (json.dumps({"id": chunk_id, "text": text, "metadata": metadata}) + "\n").encode("utf-8")
+        self._spool.write(line)
+        self._lengths.append(len(line))
+
+        counts: Dict[int, int] = {}
+        for term in tokenize(text):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                term_id = self.vocab[term] = len(self.terms)
+                self.terms.append(term)
+            counts[term_id] = counts.get(term_id, 0) + 1
+        for term_id, count in counts.items():
+            self._docs.append(row)
+            self._term_ids.append(term_id)
+            self._frequencies.append(count)
+
+    def build(self) -> BM25Index:
+        """Write the index, replacing any previous index in directory, and return it."""
+        self._spool.close()
+        ids = np.array(self.ids, dtype=str)
+        lengths = np.frombuffer(self._lengths, dtype=np.int64)
+        docs = np.frombuffer(self._docs, dtype=np.int32)
+        term_ids = np.frombuffer(self._term_ids, dtype=np.int32)
+        frequencies = np.frombuffer(self._frequencies, dtype=np.int32)
+
+        spool_path = os.path.join(self._staging, self.SPOOL_FILE)
+        with open(os.path.join(self._staging, BM25Index.DOCS_FILE), "wb") as out:
+            if self.base is not None:
+                # Surviving base chunks come first, renumbered; added chunks follow them
+                base = self.base
+                keep = ~np.isin(base.ids, np.array(list(self._removed), dtype=str))
+                rows = np.flatnonzero(keep)
+                new_row = np.cumsum(keep) - 1
+                term_of_posting = np.repeat(np.arange(len(base.terms), dtype=np.int32), np.diff(base.indptr))
+                alive = keep[base.postings]
+                docs = np.concatenate([new_row[base.postings[alive]].astype(np.int32), docs + len(rows)])
+                term_ids = np.concatenate([term_of_posting[alive], term_ids])
+                frequencies = np.concatenate([base.frequencies[alive].astype(np.int32), frequencies])
+                ids = np.concatenate([base.ids[rows], ids])
+                lengths = np.concatenate([np.diff(base.offsets)[rows], lengths])
+                # Copy the surviving lines run by run
+                edges = np.flatnonzero(np.diff(np.concatenate([[0], keep.astype(np.int8), [0]])))
+                for start, end in zip(edges[::2], edges[1::2]):
+                    out.write(base.docs[base.offsets[start]:base.offsets[end]])
+            with open(spool_path, "rb") as spool:
+                shutil.copyfileobj(spool, out)
+        os.remove(spool_path)
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        # Drop terms that no longer occur anywhere and renumber the rest
+        counts = np.bincount(term_ids, minlength=len(self.terms))
+        used = counts > 0
+        term_ids = (np.cumsum(used) - 1)[term_ids]
+        terms = [term for term, keep_term in zip(self.terms, used) if keep_term]
+        counts = counts[used]
+
+        order = np.argsort(term_ids, kind="stable")
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        with open(os.path.join(self._staging, BM25Index.TERMS_FILE), "w", encoding="utf-8") as f:
+            json.dump(terms, f)
+        np.savez(
+            os.path.join(self._staging, BM25Index.ARRAYS_FILE),
+            indptr=indptr,
+            postings=docs[order].astype(np.int32),
+            frequencies=frequencies[order].astype(np.uint16 if len(frequencies) and frequencies.max() < 65536 else np.int32),
+            doc_lengths=np.bincount(docs, weights=frequencies, minlength=len(ids)).astype(np.float32),
+            ids=ids,
+            offsets=offsets
+        )
+
+        old_dir = f"{self.directory}.old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(self.directory):
+            os.replace(self.directory, old_dir)
+        os.replace(self._staging, self.directory)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        return BM25Index.load(self.directory)
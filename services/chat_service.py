@@ -1,23 +1,87 @@
 """Chat and RAG functionality."""
 import os
+import asyncio
 import logging
+import threading
 import markdown
-from typing import Dict, Any
-from langchain_openai import ChatOpenAI
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, Iterator, List, Optional, Tuple
 from langchain.prompts import PromptTemplate
-from langchain.schema.runnable import RunnablePassthrough
+from langchain.load import dumps
+from langchain.schema import BaseCache
+from langchain.schema.language_model import BaseLanguageModel
+from langchain.schema.messages import AIMessage
+from langchain.schema.output import ChatGeneration
 from dotenv import load_dotenv
+from services.answer_cache import AnswerCache, normalize_question
+from services.completion_cache import CompletionCache
+from services.context_packing import pack_context
+from services.index_manifest import state_path
+from services.metrics import (
+    CHAT_STAGE_SECONDS, CHAT_ERRORS, CHAT_ANSWER_CACHE, CHAT_COALESCED, CHAT_CONTEXT_TOKENS, LLM_TOKENS
+)
+from services.single_flight import AsyncSingleFlight, Flight, FlightAbandoned, SingleFlight
+from services.tokens import count_tokens
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-# Initialize LLM
-llm = ChatOpenAI(
-    model="gpt-3.5-turbo",
-    temperature=0.7,
-    openai_api_key=os.environ["OPENAI_API_KEY"]
+LLM_MODEL = "gpt-3.5-turbo"
+
+# Built on first use by get_llm(); assign a chat model to use it instead
+llm: Optional[BaseLanguageModel] = None
+_llm_lock = threading.Lock()
+
+
+def get_llm() -> BaseLanguageModel:
+    """Process-wide chat model, built on first use so importing this module stays cheap."""
+    global llm
+    if llm is None:
+        with _llm_lock:
+            if llm is None:
+                from langchain_openai import ChatOpenAI
+                
+                temperature = float(os.environ.get("LLM_TEMPERATURE", "0.7"))
+                llm = ChatOpenAI(
+                    model=LLM_MODEL,
+                    temperature=temperature,
+                    openai_api_key=os.environ["OPENAI_API_KEY"],
+                    cache=_completion_cache(LLM_MODEL, temperature)
+                )
+    return llm
+
+
+def _completion_cache(model: str, temperature: float) -> Optional[CompletionCache]:
+    """Persistent completion cache, or None when disabled or when sampling makes identical calls differ.
+    
+    With a temperature above 0 the same prompt is expected to give different
+    answers, so the cache is bypassed unless COMPLETION_CACHE_ANY_TEMPERATURE
+    is set.
+    """
+    path = os.environ.get("COMPLETION_CACHE_PATH", state_path("completion_cache.sqlite"))
+    if not path:
+        return None
+    any_temperature = os.environ.get("COMPLETION_CACHE_ANY_TEMPERATURE", "false").strip().lower() in ("1", "true", "yes")
+    if temperature > 0 and not any_temperature:
+        logger.info(f"Completion cache bypassed: LLM_TEMPERATURE is {temperature}")
+        return None
+    max_bytes = int(os.environ.get("COMPLETION_CACHE_MAX_MB", "256")) * 1024 * 1024
+    return CompletionCache(path, max_bytes=max_bytes, model=model)
+
+
+# Cache of answers per (question, index version); ANSWER_CACHE_SIZE=0 disables it
+_semantic_threshold = os.environ.get("ANSWER_CACHE_SEMANTIC_THRESHOLD", "")
+answer_cache = AnswerCache(
+    max_entries=int(os.environ.get("ANSWER_CACHE_SIZE", "256")),
+    ttl=float(os.environ.get("ANSWER_CACHE_TTL", "3600")),
+    semantic_threshold=float(_semantic_threshold) if _semantic_threshold else None
 )
 
+# Identical questions asked while one is being answered wait for that answer instead of calling the LLM again
+chat_flights = SingleFlight()
+async_chat_flights = AsyncSingleFlight()
+
 # HR Analysis prompt template
 HR_PROMPT = PromptTemplate(
     template="""You are an expert HR analyst. Analyze the following question using the provided context.
@@ -47,44 +111,525 @@ Focus on HR factors like skills, experience, qualifications, and cultural fit.
 )
 
 
-def process_chat_question(question: str, vectorstore) -> Dict[str, Any]:
-    """Process chat question using RAG chain."""
-    if not vectorstore:
+def process_chat_question(question: str, runtime, retriever_mode: Optional[str] = None) -> Dict[str, Any]:
+    """Process chat question using the runtime's retriever and RAG chain.
+    
+    ``retriever_mode`` selects "vector", "keyword", "hybrid" or "candidate" retrieval
+    (default: RETRIEVER_MODE).
+    """
+    if not runtime:
         raise ValueError("Vector store not available")
     
-    # Create retriever
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
+    mode = runtime.resolve_mode(retriever_mode)
+    cache_key = (runtime.version, mode)
+    embed = _question_embedder(runtime)
+    cached = answer_cache.get(question, cache_key, embed)
+    _record_cache(cached)
+    if cached is not None:
+        return cached
     
-    # Create RAG chain
-    chain = (
-        {
-            "context": retriever | _format_docs,
-            "question": RunnablePassthrough()
-        }
-        | HR_PROMPT
-        | llm
+    response, shared = chat_flights.do(
+        _flight_key(question, cache_key), lambda: _answer_question(question, runtime, mode, cache_key, embed)
     )
+    if shared:
+        CHAT_COALESCED.inc()
+    return response
+
+
+def _answer_question(question: str, runtime, mode: str, cache_key, embed: Callable[[str], List[float]]) -> Dict[str, Any]:
+    """Retrieve, call the LLM and render one answer, caching the response."""
+    # Retrieve once; the same documents feed the prompt context and the sources
+    source_docs = _retrieve(question, runtime, mode, embed)
     
     # Execute chain
-    result = chain.invoke(question)
+    with _stage("pack"):
+        context = _format_docs(source_docs, runtime.context_budget)
+    with _stage("llm"):
+        result = runtime.chain.invoke({"context": context, "question": question})
+    _record_usage(result)
     markdown_answer = result.content if hasattr(result, 'content') else str(result)
     
     # Convert to HTML
-    html_answer = markdown.markdown(markdown_answer)
+    with _stage("render"):
+        html_answer = markdown.markdown(markdown_answer)
+    
+    sources = _format_sources(source_docs)
+    
+    response = {"answer": html_answer, "sources": sources}
+    answer_cache.put(question, cache_key, response, embed)
+    return response
+
+
+def process_chat_batch(
+    questions: List[str],
+    runtime,
+    retriever_mode: Optional[str] = None,
+    max_concurrency: int = 8
+) -> List[Dict[str, Any]]:
+    """Answer many questions at once; results (or per-question errors) come back in input order.
+    
+    Questions that normalize to the same text are answered once and the
+    result is repeated for each of them. All distinct questions are
+    embedded in one batched call whose vectors every retriever mode
+    reuses; if that call fails, questions are embedded one at a time.
+    Retrieval and the LLM call then run per question on up to
+    ``max_concurrency`` threads, timed per stage like ``/chat``. Each
+    result holds the ``question`` and either ``answer`` and ``sources``
+    or ``error``.
+    """
+    if not runtime:
+        raise ValueError("Vector store not available")
+    
+    mode = runtime.resolve_mode(retriever_mode)
+    cache_key = (runtime.version, mode)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(questions)
+    
+    # Positions of each distinct question; the first occurrence stands for the rest
+    positions: Dict[str, List[int]] = {}
+    for i, question in enumerate(questions):
+        positions.setdefault(normalize_question(question), []).append(i)
+    distinct = [indices[0] for indices in positions.values()]
+    
+    def fan_out(i: int, result: Dict[str, Any], error_stage: Optional[str] = None) -> None:
+        for j in positions[normalize_question(questions[i])]:
+            if error_stage:
+                CHAT_ERRORS.inc(stage=error_stage)
+            results[j] = {"question": questions[j], **result}
+    
+    # One embedding request for every question; keyword retrieval needs none unless the cache is semantic
+    vectors, failed = {}, {}
+    if mode != "keyword" or answer_cache.semantic:
+        with _stage("embed"):
+            vectors, failed = _embed_questions([questions[i] for i in distinct], runtime)
+    embed = vectors.get if vectors else None
+    
+    pending = []
+    for i in distinct:
+        question = questions[i]
+        if question in failed:
+            fan_out(i, {"error": f"Error: {failed[question]}"}, error_stage="embed")
+            continue
+        cached = answer_cache.get(question, cache_key, embed)
+        _record_cache(cached)
+        if cached is not None:
+            fan_out(i, cached)
+        else:
+            pending.append(i)
+    
+    def answer(i: int) -> None:
+        question = questions[i]
+        try:
+            with _stage("retrieve"):
+                docs = _search(question, runtime, mode, vectors.get(question))
+            with _stage("pack"):
+                context = _format_docs(docs, runtime.context_budget)
+            with _stage("llm"):
+                output = runtime.chain.invoke({"context": context, "question": question})
+            _record_usage(output)
+            markdown_answer = output.content if hasattr(output, 'content') else str(output)
+            with _stage("render"):
+                response = {"answer": markdown.markdown(markdown_answer), "sources": _format_sources(docs)}
+        except Exception as e:
+            logger.error(f"Batch chat error: {e}")
+            fan_out(i, {"error": f"Error: {e}"}, error_stage=getattr(e, "chat_stage", "other"))
+            return
+        answer_cache.put(question, cache_key, response, embed)
+        fan_out(i, response)
+    
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(pending)))) as pool:
+            list(pool.map(answer, pending))
+    return results
+
+
+def stream_chat_question(question: str, runtime, retriever_mode: Optional[str] = None) -> Iterator[Tuple[str, Any]]:
+    """Stream a chat answer as (event, data) pairs.
+    
+    Yields ("sources", [...]) as soon as retrieval finishes, then one
+    ("token", text) per LLM chunk, and finally ("answer", html) with the
+    rendered markdown.
+    """
+    if not runtime:
+        raise ValueError("Vector store not available")
+    
+    mode = runtime.resolve_mode(retriever_mode)
+    cache_key = (runtime.version, mode)
+    embed = _question_embedder(runtime)
+    cached = answer_cache.get(question, cache_key, embed)
+    _record_cache(cached)
+    if cached is not None:
+        yield "sources", cached["sources"]
+        yield "answer", cached["answer"]
+        return
+    
+    key = _flight_key(question, cache_key)
+    flight, shared = _join_flight(key)
+    if shared is not None:
+        yield "sources", shared["sources"]
+        yield "answer", shared["answer"]
+        return
+    
+    finished = False
+    try:
+        source_docs = _retrieve(question, runtime, mode, embed)
+        sources = _format_sources(source_docs)
+        yield "sources", sources
+        
+        with _stage("pack"):
+            context = _format_docs(source_docs, runtime.context_budget)
+        parts = []
+        # The llm stage of a stream includes the time the client takes to read it
+        with _stage("llm"):
+            for text in _stream_answer(runtime, {"context": context, "question": question}):
+                parts.append(text)
+                yield "token", text
+        
+        with _stage("render"):
+            html_answer = markdown.markdown("".join(parts))
+        response = {"answer": html_answer, "sources": sources}
+        answer_cache.put(question, cache_key, response, embed)
+        chat_flights.finish(key, flight, response)
+        finished = True
+    except Exception as e:
+        chat_flights.finish(key, flight, error=e)
+        finished = True
+        raise
+    finally:
+        # The client went away mid-stream: let a waiting request take over
+        if not finished:
+            chat_flights.abandon(key, flight)
+    yield "answer", html_answer
+
+
+async def aprocess_chat_question(question: str, runtime, retriever_mode: Optional[str] = None) -> Dict[str, Any]:
+    """Async ``process_chat_question`` for the ASGI server.
+    
+    The question embedding and the LLM call are awaited on async HTTP
+    clients, so one event loop can hold many requests in flight; vector
+    searches run on the default executor. As on the sync path, the
+    question is only embedded after an exact answer cache miss.
+    """
+    if not runtime:
+        raise ValueError("Vector store not available")
+    
+    mode = runtime.resolve_mode(retriever_mode)
+    cache_key = (runtime.version, mode)
+    aembed = _aquestion_embedder(runtime)
+    cached = await answer_cache.aget(question, cache_key, aembed)
+    _record_cache(cached)
+    if cached is not None:
+        return cached
+    
+    response, shared = await async_chat_flights.do(
+        _flight_key(question, cache_key), lambda: _aanswer_question(question, runtime, mode, cache_key, aembed)
+    )
+    if shared:
+        CHAT_COALESCED.inc()
+    return response
+
+
+async def _aanswer_question(
+    question: str,
+    runtime,
+    mode: str,
+    cache_key,
+    aembed: Callable[[str], Awaitable[List[float]]]
+) -> Dict[str, Any]:
+    """Async ``_answer_question``."""
+    source_docs = await _aretrieve(question, runtime, mode, aembed)
+    with _stage("pack"):
+        context = _format_docs(source_docs, runtime.context_budget)
+    with _stage("llm"):
+        result = await runtime.chain.ainvoke({"context": context, "question": question})
+    _record_usage(result)
+    markdown_answer = result.content if hasattr(result, 'content') else str(result)
+    
+    with _stage("render"):
+        html_answer = markdown.markdown(markdown_answer)
+    response = {"answer": html_answer, "sources": _format_sources(source_docs)}
+    await _acache_answer(question, cache_key, response, aembed)
+    return response
+
+
+async def astream_chat_question(question: str, runtime, retriever_mode: Optional[str] = None) -> AsyncIterator[Tuple[str, Any]]:
+    """Async ``stream_chat_question``: yields the same (event, data) pairs."""
+    if not runtime:
+        raise ValueError("Vector store not available")
+    
+    mode = runtime.resolve_mode(retriever_mode)
+    cache_key = (runtime.version, mode)
+    aembed = _aquestion_embedder(runtime)
+    cached = await answer_cache.aget(question, cache_key, aembed)
+    _record_cache(cached)
+    if cached is not None:
+        yield "sources", cached["sources"]
+        yield "answer", cached["answer"]
+        return
+    
+    key = _flight_key(question, cache_key)
+    while True:
+        flight, leader = async_chat_flights.join(key)
+        if leader:
+            break
+        try:
+            shared = await async_chat_flights.wait(flight)
+        except FlightAbandoned:
+            continue
+        CHAT_COALESCED.inc()
+        yield "sources", shared["sources"]
+        yield "answer", shared["answer"]
+        return
+    
+    finished = False
+    try:
+        source_docs = await _aretrieve(question, runtime, mode, aembed)
+        sources = _format_sources(source_docs)
+        yield "sources", sources
+        
+        with _stage("pack"):
+            context = _format_docs(source_docs, runtime.context_budget)
+        parts = []
+        with _stage("llm"):
+            async for text in _astream_answer(runtime, {"context": context, "question": question}):
+                parts.append(text)
+                yield "token", text
+        
+        with _stage("render"):
+            html_answer = markdown.markdown("".join(parts))
+        response = {"answer": html_answer, "sources": sources}
+        await _acache_answer(question, cache_key, response, aembed)
+        async_chat_flights.finish(key, flight, response)
+        finished = True
+    except Exception as e:
+        async_chat_flights.finish(key, flight, error=e)
+        finished = True
+        raise
+    finally:
+        if not finished:
+            async_chat_flights.abandon(key, flight)
+    yield "answer", html_answer
+
+
+def _aquestion_embedder(runtime) -> Callable[[str], Awaitable[List[float]]]:
+    """Async ``_question_embedder``: awaits the model at most once per question."""
+    vectors: Dict[str, List[float]] = {}
+    
+    async def aembed(text: str) -> List[float]:
+        if text not in vectors:
+            with _stage("embed"):
+                vectors[text] = await runtime.vectorstore.embeddings.aembed_query(text)
+        return vectors[text]
+    
+    return aembed
+
+
+async def _aretrieve(question: str, runtime, mode: str, aembed: Callable[[str], Awaitable[List[float]]]) -> List:
+    """Async ``_retrieve``: the vector search runs on the default executor."""
+    vector = await aembed(question) if mode != "keyword" else None
+    with _stage("retrieve"):
+        return await asyncio.get_running_loop().run_in_executor(None, lambda: _search(question, runtime, mode, vector))
+
+
+async def _acache_answer(question: str, cache_key, response: Dict[str, Any], aembed: Callable[[str], Awaitable[List[float]]]) -> None:
+    """Cache an answer, with the question's embedding when the semantic tier needs it."""
+    vector = await aembed(question) if answer_cache.semantic else None
+    answer_cache.put(question, cache_key, response, (lambda _: vector) if vector is not None else None)
+
+
+def _stream_answer(runtime, inputs: Dict[str, str]) -> Iterator[str]:
+    """Stream the answer text, going through the completion cache (chat models skip it when streaming).
+    
+    A cached answer comes back as a single piece of text. Token usage of a
+    streamed call is estimated with ``count_tokens``.
+    """
+    cache, prompt, llm_string = _completion_cache_key(runtime, inputs)
+    if cache is not None:
+        cached = cache.lookup(prompt, llm_string)
+        if cached:
+            yield cached[0].text
+            return
+    
+    parts = []
+    try:
+        for chunk in runtime.chain.stream(inputs):
+            text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+            if text:
+                parts.append(text)
+                yield text
+    finally:
+        _record_streamed_usage(inputs, parts)
+    if cache is not None:
+        cache.update(prompt, llm_string, [ChatGeneration(message=AIMessage(content="".join(parts)))])
+
+
+async def _astream_answer(runtime, inputs: Dict[str, str]) -> AsyncIterator[str]:
+    """Async ``_stream_answer``."""
+    cache, prompt, llm_string = _completion_cache_key(runtime, inputs)
+    if cache is not None:
+        cached = await cache.alookup(prompt, llm_string)
+        if cached:
+            yield cached[0].text
+            return
+    
+    parts = []
+    try:
+        async for chunk in runtime.chain.astream(inputs):
+            text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+            if text:
+                parts.append(text)
+                yield text
+    finally:
+        _record_streamed_usage(inputs, parts)
+    if cache is not None:
+        await cache.aupdate(prompt, llm_string, [ChatGeneration(message=AIMessage(content="".join(parts)))])
+
+
+def _completion_cache_key(runtime, inputs: Dict[str, str]) -> Tuple[Optional[BaseCache], str, str]:
+    """The chain model's cache with the prompt and llm strings it would use for an invoke with inputs."""
+    model = runtime.chain.last
+    cache = getattr(model, "cache", None)
+    if not isinstance(cache, BaseCache):
+        return None, "", ""
+    return cache, dumps(HR_PROMPT.invoke(inputs).to_messages()), model._get_llm_string()
+
+
+def _flight_key(question: str, cache_key) -> Tuple:
+    """Requests coalesce when the answer cache would treat them as the same question."""
+    return (*cache_key, normalize_question(question))
+
+
+def _join_flight(key: Tuple) -> Tuple[Flight, Optional[Dict[str, Any]]]:
+    """Lead the key's flight, or wait for the request leading it and return its response.
+    
+    Returns ``(flight, None)`` to the leader, which must finish or abandon
+    the flight, and ``(flight, response)`` to a follower.
+    """
+    while True:
+        flight, leader = chat_flights.join(key)
+        if leader:
+            return flight, None
+        try:
+            response = flight.wait()
+        except FlightAbandoned:
+            continue
+        CHAT_COALESCED.inc()
+        return flight, response
+
+
+def _question_embedder(runtime) -> Callable[[str], List[float]]:
+    """Embed function that calls the model at most once per question, timed as the embed stage."""
+    vectors: Dict[str, List[float]] = {}
+    
+    def embed(text: str) -> List[float]:
+        if text not in vectors:
+            with _stage("embed"):
+                vectors[text] = runtime.vectorstore.embeddings.embed_query(text)
+        return vectors[text]
+    
+    return embed
+
+
+def _retrieve(question: str, runtime, mode: str, embed: Callable[[str], List[float]]) -> List:
+    """Retrieve with the mode's retriever, searching with the question's (shared) embedding."""
+    vector = embed(question) if mode != "keyword" else None
+    with _stage("retrieve"):
+        return _search(question, runtime, mode, vector)
+
+
+def _search(question: str, runtime, mode: str, vector: Optional[List[float]]) -> List:
+    """Run the mode's retriever with a precomputed question embedding; keyword mode needs none."""
+    retriever = runtime.get_retriever(mode)
+    if mode == "keyword":
+        return retriever.invoke(question)
+    if mode == "vector":
+        return runtime.vectorstore.similarity_search_by_vector(vector, **retriever.search_kwargs)
+    return retriever.search_by_vector(question, vector)
+
+
+def _embed_questions(questions: List[str], runtime) -> Tuple[Dict[str, List[float]], Dict[str, Exception]]:
+    """Embed questions in one call; if it fails, embed them one at a time.
+    
+    Returns the vectors and, for questions that could not be embedded, their errors.
+    """
+    embeddings = runtime.vectorstore.embeddings
+    try:
+        return dict(zip(questions, embeddings.embed_documents(questions))), {}
+    except Exception as e:
+        logger.warning(f"Batched question embedding failed, embedding one at a time: {e}")
+    
+    vectors, failed = {}, {}
+    for question in questions:
+        try:
+            vectors[question] = embeddings.embed_query(question)
+        except Exception as e:
+            logger.error(f"Batch embedding error: {e}")
+            failed[question] = e
+    return vectors, failed
+
+
+def record_chat_error(error: Exception) -> None:
+    """Count a failed chat question under the stage that raised it ("other" outside the timed stages)."""
+    CHAT_ERRORS.inc(stage=getattr(error, "chat_stage", "other"))
+
+
+@contextmanager
+def _stage(stage: str) -> Iterator[None]:
+    """Time one stage of answering a question; an exception raised in it is tagged with the stage."""
+    with CHAT_STAGE_SECONDS.time(stage=stage):
+        try:
+            yield
+        except Exception as e:
+            if not hasattr(e, "chat_stage"):
+                try:
+                    e.chat_stage = stage
+                except AttributeError:
+                    pass
+            raise
+
+
+def _record_cache(cached: Optional[Dict[str, Any]]) -> None:
+    CHAT_ANSWER_CACHE.inc(result="miss" if cached is None else "hit")
+
+
+def _record_usage(result) -> None:
+    """Count the token usage the chat model reported, if any."""
+    usage = (getattr(result, "response_metadata", None) or {}).get("token_usage") or {}
+    for kind in ("prompt", "completion"):
+        if usage.get(f"{kind}_tokens"):
+            LLM_TOKENS.inc(usage[f"{kind}_tokens"], type=kind)
+
+
+def _record_streamed_usage(inputs: Dict[str, str], parts: List[str]) -> None:
+    """Count estimated tokens for a streamed answer; streamed responses report no usage.
     
-    # Get source documents
-    source_docs = retriever.get_relevant_documents(question)
-    sources = [
+    Nothing is counted when the stream failed before producing any text.
+    A stream the client abandoned counts the text generated so far.
+    """
+    if not parts:
+        return
+    LLM_TOKENS.inc(count_tokens(HR_PROMPT.format(**inputs)), type="prompt")
+    LLM_TOKENS.inc(count_tokens("".join(parts)), type="completion")
+
+
+def _format_docs(docs, budget: int) -> str:
+    """Pack retrieved documents into a context within budget tokens."""
+    context, stats = pack_context(docs, budget)
+    saved = stats["tokens_in"] - stats["tokens_packed"]
+    CHAT_CONTEXT_TOKENS.inc(stats["tokens_in"], kind="retrieved")
+    CHAT_CONTEXT_TOKENS.inc(stats["tokens_packed"], kind="packed")
+    logger.info(
+        f"Packed {stats['chunks_packed']}/{stats['chunks']} chunks into {stats['tokens_packed']} context tokens "
+        f"(saved {saved} of {stats['tokens_in']}, {stats['duplicates']} duplicates dropped)"
+    )
+    return context
+
+
+def _format_sources(docs) -> List[Dict[str, Any]]:
+    """Format retrieved documents as source previews."""
+    return [
         {
             "content": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content,
             "metadata": doc.metadata
         }
-        for doc in source_docs
+        for doc in docs
     ]
-    
-    return {"answer": html_answer, "sources": sources}
-
-
-def _format_docs(docs) -> str:
-    """Format retrieved documents for context."""
-    return "\n\n".join(doc.page_content for doc in docs)
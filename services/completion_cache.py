@@ -0,0 +1,126 @@
+"""Persistent cache of chat model completions keyed by rendered prompt and model parameters."""
+import json
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+from langchain.schema import BaseCache
+from langchain.schema.messages import AIMessage
+from langchain.schema.output import ChatGeneration, Generation
+from services.tokens import count_tokens
+from services.metrics import COMPLETION_CACHE, COMPLETION_CACHE_SAVED_TOKENS, COMPLETION_CACHE_SAVED_DOLLARS
+from services.sqlite_lru import SQLiteLRU
+
+logger = logging.getLogger(__name__)
+
+# USD per 1K (prompt, completion) tokens, matched by the longest model name prefix
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.005, 0.015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+}
+
+
+def model_prices(model: Optional[str]) -> Tuple[float, float]:
+    """Price per 1K prompt and completion tokens for model, or zeros when it is unknown."""
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model and model.startswith(name):
+            return MODEL_PRICES[name]
+    return 0.0, 0.0
+
+
+class CompletionCache(BaseCache):
+    """Size-bounded SQLite LRU cache of completions, usable as a chat model's ``cache``.
+
+    Entries are keyed by ``sha256(llm_string, prompt)``: LangChain passes the
+    fully rendered messages as the prompt and the model name, temperature
+    and other parameters as the llm string, so only an identical call is
+    served. Each entry keeps the completion text and the tokens the call
+    used, so hits report the tokens and dollars they saved. Entries live in
+    a ``SQLiteLRU`` table shared safely between threads and worker processes.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, model: Optional[str] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.prices = model_prices(model)
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self.dollars_saved = 0.0
+        self._lock = threading.Lock()
+        self._store = SQLiteLRU(
+            path,
+            "completions",
+            {"texts": "TEXT NOT NULL", "prompt_tokens": "INTEGER NOT NULL", "completion_tokens": "INTEGER NOT NULL"},
+            max_bytes
+        )
+
+    def __repr__(self) -> str:
+        # A model's llm string serializes its cache by repr; the default one holds the object's address
+        return f"CompletionCache({self.path!r})"
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[List[Generation]]:
+        """Cached generations for an identical call, or None."""
+        key = self._key(prompt, llm_string)
+        row = self._store.get_many([key]).get(key)
+        if row is None:
+            self._count(miss=True)
+            return None
+
+        texts, prompt_tokens, completion_tokens = row
+        self._count(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        # No token_usage on hits, so they are not counted as tokens spent
+        return [
+            ChatGeneration(message=AIMessage(content=text, response_metadata={"completion_cache": "hit"}))
+            for text in json.loads(texts)
+        ]
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        """Store the generations of a call with the tokens it used (estimated when not reported)."""
+        texts = [generation.text for generation in return_val]
+        usage = {}
+        if return_val and isinstance(return_val[0], ChatGeneration):
+            usage = return_val[0].message.response_metadata.get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens") or count_tokens(prompt)
+        completion_tokens = usage.get("completion_tokens") or sum(count_tokens(text) for text in texts)
+
+        blob = json.dumps(texts)
+        self._store.put_many([(self._key(prompt, llm_string), (blob, prompt_tokens, completion_tokens), len(blob))])
+
+    def clear(self, **kwargs) -> None:
+        self._store.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Hits, misses and what the hits saved since process start."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "tokens_saved": self.tokens_saved,
+                "dollars_saved": round(self.dollars_saved, 6)
+            }
+
+    def _key(self, prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def _count(self, miss: bool = False, prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        if miss:
+            with self._lock:
+                self.misses += 1
+            COMPLETION_CACHE.inc(result="miss")
+            return
+
+        prompt_price, completion_price = self.prices
+        dollars = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+        with self._lock:
+            self.hits += 1
+            self.tokens_saved += prompt_tokens + completion_tokens
+            self.dollars_saved += dollars
+        COMPLETION_CACHE.inc(result="hit")
+        COMPLETION_CACHE_SAVED_TOKENS.inc(prompt_tokens + completion_tokens)
+        COMPLETION_CACHE_SAVED_DOLLARS.inc(dollars)
@@ -0,0 +1,119 @@
+"""Pack retrieved chunks into a token-budgeted prompt context."""
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from langchain.schema import Document
+from services.tokens import count_tokens
+
+# Context tokens per chat model, leaving room for the prompt template and the answer
+CONTEXT_TOKEN_BUDGETS = {
+    "gpt-3.5-turbo": 3000,
+    "gpt-4": 4000,
+    "gpt-4-turbo": 8000,
+    "gpt-4o": 8000,
+    "gpt-4o-mini": 8000,
+}
+DEFAULT_CONTEXT_TOKEN_BUDGET = 3000
+SEPARATOR = "\n\n"
+
+_WORD = re.compile(r"\w+")
+
+
+def context_token_budget(model: Optional[str] = None) -> int:
+    """CONTEXT_TOKEN_BUDGET if set, else the budget for model (matched by its longest known prefix)."""
+    configured = os.environ.get("CONTEXT_TOKEN_BUDGET", "")
+    if configured:
+        return int(configured)
+    for name in sorted(CONTEXT_TOKEN_BUDGETS, key=len, reverse=True):
+        if model and model.startswith(name):
+            return CONTEXT_TOKEN_BUDGETS[name]
+    return DEFAULT_CONTEXT_TOKEN_BUDGET
+
+
+def _shingles(text: str, size: int = 5) -> Set[int]:
+    words = _WORD.findall(text.lower())
+    return {hash(tuple(words[i:i + size])) for i in range(max(1, len(words) - size + 1))}
+
+
+def _trim_overlap(packed: str, text: str, min_overlap: int = 40, window: int = 400) -> str:
+    """Drop the part of text that repeats the start or end of packed (the splitter's chunk overlap)."""
+    # text continues packed: its start repeats packed's end
+    head = text[:min_overlap]
+    start = packed.find(head, max(0, len(packed) - window))
+    while start != -1:
+        if text.startswith(packed[start:]):
+            return text[len(packed) - start:].lstrip()
+        start = packed.find(head, start + 1)
+    # text precedes packed: its end repeats packed's start
+    head = packed[:min_overlap]
+    start = text.find(head, max(0, len(text) - window))
+    while start != -1:
+        if packed.startswith(text[start:]):
+            return text[:start].rstrip()
+        start = text.find(head, start + 1)
+    return text
+
+
+def pack_context(
+    docs: Sequence[Document],
+    budget: int,
+    duplicate_threshold: float = 0.8
+) -> Tuple[str, Dict[str, int]]:
+    """Join chunks, most relevant first, into a context of at most budget tokens.
+
+    ``docs`` must be in relevance order, as retrievers return them. A chunk
+    whose word shingles overlap a packed chunk's by ``duplicate_threshold``
+    (Jaccard) or more is dropped; text a chunk shares with a packed chunk of
+    the same source through the splitter's overlap is trimmed. Chunks are
+    then added greedily while they fit, skipping ones that would not; if even
+    the most relevant chunk does not fit, it is cut to the budget. Returns
+    the context and counts of chunks and tokens before and after packing.
+    """
+    stats = {"chunks": len(docs), "chunks_packed": 0, "duplicates": 0, "tokens_in": 0, "tokens_packed": 0}
+    packed: List[str] = []
+    packed_shingles: List[Set[int]] = []
+    packed_by_source: Dict[str, List[str]] = {}
+    separator_tokens = count_tokens(SEPARATOR)
+    used = 0
+
+    for doc in docs:
+        text = doc.page_content.strip()
+        stats["tokens_in"] += count_tokens(text) + (separator_tokens if stats["tokens_in"] else 0)
+        shingles = _shingles(text)
+        if any(len(shingles & other) / len(shingles | other) >= duplicate_threshold for other in packed_shingles):
+            stats["duplicates"] += 1
+            continue
+
+        source = str(doc.metadata.get("source", ""))
+        for other in packed_by_source.get(source, []):
+            text = _trim_overlap(other, text)
+        if not text:
+            stats["duplicates"] += 1
+            continue
+        tokens = count_tokens(text) + (separator_tokens if packed else 0)
+        if used + tokens > budget:
+            if packed:
+                continue
+            text = _truncate(text, budget)
+            tokens = count_tokens(text)
+
+        packed.append(text)
+        packed_shingles.append(shingles)
+        packed_by_source.setdefault(source, []).append(doc.page_content.strip())
+        used += tokens
+
+    stats.update(chunks_packed=len(packed), tokens_packed=used)
+    return SEPARATOR.join(packed), stats
+
+
+def _truncate(text: str, budget: int) -> str:
+    """Longest prefix of text, cut at a word boundary, that fits in budget tokens."""
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    cut = text[:low]
+    return cut if low == len(text) else cut.rsplit(" ", 1)[0]
@@ -1,40 +1,124 @@
 """Document processing and vector store operations."""
 import os
 import glob
+import time
+import shutil
 import logging
-from typing import List, Optional
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings
-from langchain_pinecone import PineconeVectorStore
-from langchain_community.document_loaders import TextLoader, PyPDFLoader, Docx2txtLoader
-from pinecone import Pinecone
+import itertools
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from langchain.schema import Document
+from langchain.schema.embeddings import Embeddings
+from langchain.schema.vectorstore import VectorStore
 from dotenv import load_dotenv
+from services.embedding_cache import CachedEmbeddings
+from services.local_store import LocalVectorStore
+from services.hnsw_store import HNSWVectorStore
+from services.embedding_pipeline import embed_and_upsert_stream
+from services.bm25_index import BM25Index, BM25Builder
+from services.ranking import CandidateRanker
+from services.metrics import INGEST_PHASE_SECONDS, timed_iter
+from services.index_manifest import (
+    DEFAULT_GENERATION, state_path, default_manifest_path, load_manifest, save_manifest, diff_manifest, chunk_ids,
+    load_index_pointer, save_index_pointer, new_generation, index_write_lock
+)
+
+if TYPE_CHECKING:
+    from pinecone import Pinecone
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-# Initialize components
-embeddings = OpenAIEmbeddings(openai_api_key=os.environ["OPENAI_API_KEY"])
+
+def _build_embeddings() -> Embeddings:
+    """OpenAI embeddings behind the on-disk embedding cache (disabled when EMBEDDING_CACHE_PATH is empty)."""
+    from langchain_openai import OpenAIEmbeddings
+    
+    openai_embeddings = OpenAIEmbeddings(openai_api_key=os.environ["OPENAI_API_KEY"])
+    cache_path = os.environ.get("EMBEDDING_CACHE_PATH", state_path("embedding_cache.sqlite"))
+    if not cache_path:
+        return openai_embeddings
+    max_bytes = int(os.environ.get("EMBEDDING_CACHE_MAX_MB", "1024")) * 1024 * 1024
+    return CachedEmbeddings(openai_embeddings, cache_path, max_bytes=max_bytes)
+
+
+# Built on first use by get_embeddings(); assign an Embeddings object to use it instead
+embeddings: Optional[Embeddings] = None
+_embeddings_lock = threading.Lock()
 
 
-def load_documents(path: str) -> List:
+def get_embeddings() -> Embeddings:
+    """Process-wide embeddings client, built on first use so importing this module stays cheap."""
+    global embeddings
+    if embeddings is None:
+        with _embeddings_lock:
+            if embeddings is None:
+                embeddings = _build_embeddings()
+    return embeddings
+
+
+def load_documents(path: str, workers: Optional[int] = None) -> List:
     """Load documents from file or directory path."""
-    documents = []
-    
+    return list(iter_documents(path, workers))
+
+
+def iter_documents(path: str, workers: Optional[int] = None) -> Iterator:
+    """Yield documents from file or directory path one file at a time."""
+    parsed_files = timed_iter(iter_parsed_files(discover_files(path), workers), INGEST_PHASE_SECONDS, phase="load")
+    for file_path, documents, error in parsed_files:
+        if error:
+            logger.error(f"Error loading {file_path}: {error}")
+        yield from documents
+
+
+def discover_files(path: str) -> List[str]:
+    """List supported files under path in a deterministic order."""
     if os.path.isfile(path):
-        documents.extend(_load_single_file(path))
-    elif os.path.isdir(path):
+        return [path]
+    
+    files = []
+    if os.path.isdir(path):
         for ext in ['*.txt', '*.pdf', '*.docx']:
-            files = glob.glob(os.path.join(path, '**', ext), recursive=True)
-            for file in files:
-                documents.extend(_load_single_file(file))
+            files.extend(sorted(glob.glob(os.path.join(path, '**', ext), recursive=True)))
+    return files
+
+
+def iter_parsed_files(files: List[str], workers: Optional[int] = None) -> Iterator[Tuple[str, List, Optional[str]]]:
+    """Yield ``(file_path, documents, error)`` for each file, in order.
     
-    return documents
+    With workers > 1 files are parsed in a process pool that runs at most
+    ``4 * workers`` files ahead of the consumer, so parsed documents never
+    pile up faster than they are used.
+    """
+    if workers is None:
+        workers = int(os.environ.get("INGEST_WORKERS", "1"))
+    
+    if workers > 1 and len(files) > 1:
+        # Spawned, not forked: the server's other threads may hold locks a forked child would inherit
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            window = deque()
+            for file_path in files:
+                window.append((file_path, executor.submit(_parse_file, file_path)))
+                if len(window) >= 4 * workers:
+                    file_path, future = window.popleft()
+                    yield (file_path, *future.result())
+            while window:
+                file_path, future = window.popleft()
+                yield (file_path, *future.result())
+    else:
+        for file_path in files:
+            yield (file_path, *_parse_file(file_path))
 
 
-def _load_single_file(file_path: str) -> List:
-    """Load a single file based on extension."""
+def _parse_file(file_path: str) -> Tuple[List, Optional[str]]:
+    """Parse a single file, returning its documents and an error message if it failed."""
     try:
+        from langchain_community.document_loaders import TextLoader, PyPDFLoader, Docx2txtLoader
+        
         loaders = {
             '.txt': lambda: TextLoader(file_path, encoding='utf-8'),
             '.pdf': lambda: PyPDFLoader(file_path),
@@ -44,37 +128,51 @@ def _load_single_file(file_path: str) -> List:
         ext = os.path.splitext(file_path)[1].lower()
         if ext not in loaders:
             logger.warning(f"Unsupported file type: {ext}")
-            return []
+            return [], None
         
         documents = loaders[ext]().load()
         logger.info(f"Loaded {len(documents)} documents from {file_path}")
-        return documents
+        return documents, None
         
     except Exception as e:
-        logger.error(f"Error loading {file_path}: {e}")
-        return []
+        return [], str(e)
 
 
-def create_vector_store(documents: List) -> Optional[PineconeVectorStore]:
-    """Create vector store from documents."""
-    if not documents:
+@index_write_lock()
+def create_vector_store(documents: Iterable) -> Optional[VectorStore]:
+    """Create vector store from documents.
+    
+    ``documents`` may be a generator such as ``iter_documents(path)``; it is
+    split and embedded batch by batch without being materialized.
+    """
+    documents = iter(documents)
+    first = next(documents, None)
+    if first is None:
         return None
     
     try:
-        # Split documents
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        chunks = splitter.split_documents(documents)
-        
-        # Setup Pinecone
-        pc = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
-        index_name = os.environ["INDEX_NAME"]
+        generation = load_index_pointer()["active"]
+        vectorstore = _open_vector_store(for_write=True, generation=generation)
+        # An empty generation starts a BM25 index; one that already has chunks extends its index
+        keyword_builder = _keyword_builder(generation, fresh=not _generation_has_chunks(vectorstore, generation))
+        sources = set()
         
-        # Ensure index exists with correct dimension
-        _ensure_index_exists(pc, index_name)
+        def chunk_stream():
+            for chunk in _iter_chunks(itertools.chain([first], documents)):
+                chunk_id = os.urandom(12).hex()
+                sources.add(chunk.metadata.get("source", ""))
+                if keyword_builder:
+                    keyword_builder.add(chunk_id, chunk.page_content, chunk.metadata)
+                yield chunk, chunk_id
         
-        # Create vector store
-        vectorstore = PineconeVectorStore.from_documents(chunks, embeddings, index_name=index_name)
-        logger.info(f"Created vector store with {len(chunks)} chunks")
+        stats = _upsert_chunks(vectorstore, chunk_stream(), generation)
+        if isinstance(vectorstore, LocalVectorStore):
+            vectorstore.persist()
+        if keyword_builder:
+            keyword_builder.build()
+        _update_candidate_index(generation, sources)
+        _bump_index_version()
+        logger.info(f"Created vector store with {stats['chunks']} chunks")
         return vectorstore
         
     except Exception as e:
@@ -82,51 +180,542 @@ def create_vector_store(documents: List) -> Optional[PineconeVectorStore]:
         return None
 
 
-def get_vector_store() -> Optional[PineconeVectorStore]:
-    """Get existing vector store."""
+@index_write_lock()
+def sync_vector_store(
+    path: str,
+    rebuild: bool = False,
+    progress: Optional[Callable[..., None]] = None
+) -> Optional[Dict[str, Any]]:
+    """Sync the vector store with the files under path.
+    
+    Incremental sync updates the active index generation in place: only new
+    or changed files (by size/mtime, then content hash) are parsed and
+    embedded, and chunks of changed and deleted files are removed by ID once
+    their replacements are upserted. Searches of the serving index see the
+    upserted chunks as they land, before that removal; only a rebuild is
+    switched over atomically. With rebuild=True every file is indexed into
+    a new generation that is promoted only after it is complete; the
+    generation it replaces is kept for ``rollback_index``. A generation
+    whose chunks no manifest tracks is always rebuilt this way.
+    ``progress`` receives keyword updates (phase, files_total, files_parsed,
+    chunks_total, chunks_embedded) as the sync advances. Files that fail to
+    parse are skipped and reported in the summary's ``failed_files``.
+    Index writers hold ``index_write_lock``, so syncs started by different
+    workers run one after the other.
+    """
+    report = progress or (lambda **fields: None)
+    pointer = load_index_pointer()
+    generation = None
+    
     try:
-        return PineconeVectorStore(index_name=os.environ["INDEX_NAME"], embedding=embeddings)
+        if not rebuild and _has_untracked_chunks(pointer["active"]):
+            logger.warning(
+                f"Index generation {pointer['active']} holds chunks that no manifest tracks "
+                f"(built by create_vector_store or before manifests existed); running a full rebuild "
+                f"instead of an incremental sync, which would index every file a second time"
+            )
+            rebuild = True
+        generation = new_generation(pointer) if rebuild else pointer["active"]
+        index_name = _index_key(generation)
+        manifest_path = default_manifest_path(generation)
+        manifest = {} if rebuild else load_manifest(manifest_path, index_name)
+        
+        report(phase="scan")
+        files = discover_files(path)
+        changed, deleted = diff_manifest(manifest, files)
+        summary = {"files": len(files), "changed": len(changed), "deleted": len(deleted), "chunks": 0, "failed": 0}
+        report(files_total=len(changed))
+        if rebuild and not files:
+            # Never promote an empty generation over a serving one
+            return summary
+        
+        if changed or deleted:
+            vectorstore = _open_vector_store(for_write=True, generation=generation)
+            keyword_builder = _keyword_builder(generation, fresh=not manifest)
+            stale_ids = []
+            for file_path in [*changed, *deleted]:
+                if file_path in manifest:
+                    stale_ids.extend(manifest.pop(file_path)["chunk_ids"])
+            if keyword_builder:
+                keyword_builder.remove(stale_ids)
+            
+            # Parse, split and upsert new or changed files under deterministic IDs,
+            # streaming file by file so memory stays bounded by the embedding batches
+            report(phase="ingest")
+            failures = {}
+            
+            def chunk_stream():
+                chunks_total = 0
+                parsed_files = timed_iter(iter_parsed_files(list(changed)), INGEST_PHASE_SECONDS, phase="load")
+                for parsed, (file_path, documents, error) in enumerate(parsed_files, 1):
+                    if error:
+                        failures[file_path] = error
+                        logger.error(f"Error loading {file_path}: {error}")
+                        report(files_parsed=parsed)
+                        continue
+                    file_chunks = _split_documents(documents)
+                    entry = changed[file_path]
+                    entry["chunk_ids"] = chunk_ids(file_path, entry["sha256"], len(file_chunks))
+                    manifest[file_path] = entry
+                    chunks_total += len(file_chunks)
+                    report(files_parsed=parsed, chunks_total=chunks_total)
+                    for chunk, chunk_id in zip(file_chunks, entry["chunk_ids"]):
+                        if keyword_builder:
+                            keyword_builder.add(chunk_id, chunk.page_content, chunk.metadata)
+                        yield chunk, chunk_id
+            
+            stats = _upsert_chunks(vectorstore, chunk_stream(), generation, progress=lambda embedded: report(chunks_embedded=embedded))
+            
+            # New chunk IDs embed the content hash, so old chunks are only removed after their replacements exist
+            if stale_ids:
+                vectorstore.delete(ids=stale_ids)
+                mirror = _vector_mirror(generation)
+                if mirror:
+                    mirror.delete(ids=stale_ids)
+            if isinstance(vectorstore, LocalVectorStore):
+                vectorstore.persist()
+            if keyword_builder:
+                keyword_builder.build()
+            _update_candidate_index(generation, [*changed, *deleted])
+            summary.update(chunks=stats["chunks"], failed=len(failures), failed_files=failures)
+        
+        save_manifest(manifest, manifest_path, index_name)
+        if rebuild:
+            _promote_generation(generation, pointer)
+        elif changed or deleted:
+            _bump_index_version()
+        summary["generation"] = generation
+        logger.info(f"Synced vector store: {summary}")
+        return summary
+        
+    except Exception as e:
+        logger.error(f"Error syncing vector store: {e}")
+        if rebuild and generation:
+            _drop_generation(generation)
+        return None
+
+
+@index_write_lock()
+def rollback_index() -> Optional[str]:
+    """Serve the previous index generation again; returns it, or None if there is none.
+    
+    The generation being replaced becomes the new rollback target, so a
+    rollback can itself be undone.
+    """
+    pointer = load_index_pointer()
+    if not pointer["previous"]:
+        return None
+    save_index_pointer(pointer["previous"], pointer["active"])
+    _bump_index_version()
+    logger.info(f"Rolled back index from {pointer['active']} to {pointer['previous']}")
+    return pointer["previous"]
+
+
+def get_index_generations() -> Dict[str, Optional[str]]:
+    """Active and previous (rollback) index generations."""
+    return load_index_pointer()
+
+
+def _promote_generation(generation: str, pointer: Dict[str, Optional[str]]) -> None:
+    """Atomically serve a fully built generation, keeping the current one for rollback."""
+    save_index_pointer(generation, pointer["active"])
+    _bump_index_version()
+    logger.info(f"Promoted index generation {generation} (previous: {pointer['active']})")
+    
+    # Only one generation is kept for rollback
+    stale = pointer["previous"]
+    if stale and stale not in (generation, pointer["active"]):
+        _drop_generation(stale)
+
+
+def _drop_generation(generation: str) -> None:
+    """Delete a generation's vectors and manifest; failures are logged, not raised."""
+    try:
+        if _backend() in ("local", "hnsw"):
+            vectorstore = _open_vector_store(generation=generation)
+            if generation == DEFAULT_GENERATION:
+                vectorstore.delete_all()  # other generations live below its directory
+            else:
+                vectorstore.destroy()
+        else:
+            _pinecone_index(os.environ["INDEX_NAME"]).delete(delete_all=True, namespace=_namespace(generation))
+            mirror = _vector_mirror(generation)
+            if mirror:
+                mirror.destroy()
+        manifest_path = default_manifest_path(generation)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        shutil.rmtree(_keyword_index_dir(generation), ignore_errors=True)
+        shutil.rmtree(f"{_keyword_index_dir(generation)}.tmp", ignore_errors=True)
+        _candidate_store(generation).destroy()
+        logger.info(f"Dropped index generation {generation}")
+    except Exception as e:
+        logger.error(f"Error dropping index generation {generation}: {e}")
+
+
+def _upsert_chunks(
+    vectorstore: VectorStore,
+    chunks: Iterable[Tuple[Document, str]],
+    generation: str,
+    progress: Optional[Callable[[int], None]] = None
+) -> Dict[str, float]:
+    """Embed ``(chunk, id)`` pairs in concurrent, rate-limited batches and upsert them into generation.
+    
+    Chunks are consumed lazily. Local stores take the precomputed vectors
+    directly; for Pinecone the chunk text is stored under the ``text``
+    metadata key, as ``PineconeVectorStore`` expects when searching, and the
+    vectors are also written to the generation's local mirror.
+    """
+    if isinstance(vectorstore, LocalVectorStore):
+        def upsert(texts, vectors, metadatas, batch_ids):
+            vectorstore.add_embeddings(texts, vectors, metadatas, batch_ids)
+    else:
+        index = _pinecone_index(os.environ["INDEX_NAME"])
+        namespace = _namespace(generation)
+        mirror = _vector_mirror(generation)
+        
+        def upsert(texts, vectors, metadatas, batch_ids):
+            records = [
+                (chunk_id, vector, {**metadata, "text": text})
+                for chunk_id, vector, metadata, text in zip(batch_ids, vectors, metadatas, texts)
+            ]
+            index.upsert(vectors=records, namespace=namespace, batch_size=32, show_progress=False)
+            if mirror:
+                mirror.add_embeddings(texts, vectors, metadatas, batch_ids)
+    
+    return embed_and_upsert_stream(
+        ((chunk.page_content, chunk.metadata, chunk_id) for chunk, chunk_id in chunks),
+        embed=vectorstore.embeddings.embed_documents,
+        upsert=upsert,
+        concurrency=int(os.environ.get("EMBED_CONCURRENCY", "4")),
+        max_batch_tokens=int(os.environ.get("EMBED_BATCH_TOKENS", "50000")),
+        max_batch_items=int(os.environ.get("INGEST_BATCH_SIZE", "500")),
+        tokens_per_minute=float(os.environ.get("EMBED_TOKENS_PER_MINUTE", "1000000")),
+        progress=progress
+    )
+
+
+def get_vector_store() -> Optional[VectorStore]:
+    """Get the vector store of the active index generation."""
+    try:
+        return _open_vector_store()
     except Exception as e:
         logger.error(f"Error getting vector store: {e}")
         return None
 
 
+def get_keyword_index() -> Optional[BM25Index]:
+    """BM25 index of the active generation's chunks, or None if it has none."""
+    if not _keyword_index_enabled():
+        return None
+    return BM25Index.load(_keyword_index_dir(load_index_pointer()["active"]))
+
+
+def get_ranking_store() -> Optional[LocalVectorStore]:
+    """Active generation's vectors as a local matrix store, for scoring every chunk at once.
+    
+    Local backends are that store already; for Pinecone this is the local
+    mirror, or None when VECTOR_MIRROR is disabled.
+    """
+    try:
+        return _matrix_store(load_index_pointer()["active"])
+    except Exception as e:
+        logger.error(f"Error getting ranking store: {e}")
+        return None
+
+
+def get_candidate_index() -> Optional[LocalVectorStore]:
+    """Candidate-level index of the active generation, or None if it is disabled or empty."""
+    if not _candidate_index_enabled():
+        return None
+    try:
+        candidates = _candidate_store(load_index_pointer()["active"])
+        return candidates if candidates.count() else None
+    except Exception as e:
+        logger.error(f"Error getting candidate index: {e}")
+        return None
+
+
+def _matrix_store(generation: str) -> Optional[LocalVectorStore]:
+    """Local store holding a generation's chunk vectors: the index itself, or the Pinecone mirror."""
+    if _backend() in ("local", "hnsw"):
+        return _open_vector_store(generation=generation)
+    return _vector_mirror(generation)
+
+
+def _vector_mirror(generation: str) -> Optional[LocalVectorStore]:
+    """Local copy of a Pinecone generation's vectors, or None for local backends or when VECTOR_MIRROR is off."""
+    if _backend() in ("local", "hnsw"):
+        return None
+    if os.environ.get("VECTOR_MIRROR", "true").strip().lower() in ("0", "false", "no"):
+        return None
+    return LocalVectorStore.open(get_embeddings(), state_path("vectors", generation))
+
+
+def _candidate_index_enabled() -> bool:
+    return os.environ.get("CANDIDATE_INDEX", "true").strip().lower() not in ("0", "false", "no")
+
+
+def _candidate_store(generation: str) -> LocalVectorStore:
+    return LocalVectorStore.open(get_embeddings(), state_path("candidates", generation))
+
+
+def _update_candidate_index(generation: str, sources: Iterable[str]) -> None:
+    """Recompute the candidate index entries of sources from the generation's chunk vectors.
+    
+    Each candidate (source file) gets one row keyed by its path, holding the
+    pooled vector and summary from ``CandidateRanker.profiles``; sources
+    without chunks left are removed.
+    """
+    if not _candidate_index_enabled():
+        return
+    chunk_store = _matrix_store(generation)
+    if chunk_store is None:
+        return
+    sources = set(sources)
+    profiles = list(CandidateRanker(chunk_store).profiles(sorted(sources)))
+    candidates = _candidate_store(generation)
+    if profiles:
+        candidates.add_embeddings(
+            [summary for _, _, summary, _ in profiles],
+            [vector for _, vector, _, _ in profiles],
+            [{"source": source, "chunks": chunks} for source, _, _, chunks in profiles],
+            [source for source, _, _, _ in profiles]
+        )
+    removed = sources - {source for source, _, _, _ in profiles}
+    if removed:
+        candidates.delete(ids=list(removed))
+
+
+def _keyword_index_enabled() -> bool:
+    return os.environ.get("BM25_INDEX", "true").strip().lower() not in ("0", "false", "no")
+
+
+def _keyword_index_dir(generation: str) -> str:
+    return state_path("bm25", generation)
+
+
+def _generation_has_chunks(vectorstore: VectorStore, generation: str) -> bool:
+    """Whether a generation already holds any chunk vectors."""
+    if isinstance(vectorstore, LocalVectorStore):
+        return vectorstore.count() > 0
+    mirror = _vector_mirror(generation)
+    if mirror is not None:
+        return mirror.count() > 0
+    namespaces = _pinecone_index(os.environ["INDEX_NAME"]).describe_index_stats().namespaces or {}
+    summary = namespaces.get(_namespace(generation))
+    return bool(summary and summary.vector_count)
+
+
+def _has_untracked_chunks(generation: str) -> bool:
+    """Whether a generation has chunks but no manifest recording their IDs.
+    
+    ``create_vector_store`` and indexes built before manifests existed store
+    chunks under random IDs, which an incremental sync can neither replace
+    nor remove.
+    """
+    if load_manifest(default_manifest_path(generation), _index_key(generation)):
+        return False
+    return _generation_has_chunks(_open_vector_store(for_write=True, generation=generation), generation)
+
+
+def _keyword_builder(generation: str, fresh: bool = False) -> Optional[BM25Builder]:
+    """Builder that extends the generation's BM25 index, or starts one for a fresh generation.
+    
+    Returns None when keyword indexing is disabled, or when a generation that
+    already has vectors has no BM25 index (it was built before keyword
+    indexing existed); a full rebuild creates one.
+    """
+    if not _keyword_index_enabled():
+        return None
+    directory = _keyword_index_dir(generation)
+    if fresh:
+        return BM25Builder(directory)
+    base = BM25Index.load(directory)
+    if base is None:
+        logger.warning(f"Index generation {generation} has no BM25 index; run a full rebuild to enable keyword search")
+        return None
+    return BM25Builder(directory, base)
+
+
+@index_write_lock()
 def delete_all_documents() -> bool:
-    """Delete all documents from Pinecone index."""
+    """Delete all documents from the active index generation."""
     try:
-        pc = Pinecone(api_key=os.environ["PINECONE_API_KEY"])
-        index = pc.Index(os.environ["INDEX_NAME"])
-        index.delete(delete_all=True)
+        generation = load_index_pointer()["active"]
+        if _backend() in ("local", "hnsw"):
+            _open_vector_store(generation=generation).delete_all()
+        else:
+            _pinecone_index(os.environ["INDEX_NAME"]).delete(delete_all=True, namespace=_namespace(generation))
+            mirror = _vector_mirror(generation)
+            if mirror:
+                mirror.delete_all()
+        if _keyword_index_enabled():
+            BM25Builder(_keyword_index_dir(generation)).build()
+        _candidate_store(generation).delete_all()
+        _bump_index_version()
         return True
     except Exception as e:
         logger.error(f"Error deleting documents: {e}")
         return False
 
 
-def _ensure_index_exists(pc: Pinecone, index_name: str) -> None:
-    """Ensure Pinecone index exists with correct configuration."""
-    existing_indexes = [idx.name for idx in pc.list_indexes()]
+def _backend() -> str:
+    """Configured vector store backend: "pinecone" (default), "local" or "hnsw"."""
+    return os.environ.get("VECTOR_STORE_BACKEND", "pinecone").strip().lower()
+
+
+def _local_index_dir(generation: str = DEFAULT_GENERATION) -> str:
+    """Directory of a local index generation; generations are subdirectories of LOCAL_INDEX_DIR."""
+    base = os.environ.get("LOCAL_INDEX_DIR") or state_path("local_index")
+    return base if generation == DEFAULT_GENERATION else os.path.join(base, generation)
+
+
+def _namespace(generation: str) -> str:
+    """Pinecone namespace of a generation; the default generation uses the default namespace."""
+    return "" if generation == DEFAULT_GENERATION else generation
+
+
+def _index_key(generation: str = DEFAULT_GENERATION) -> str:
+    """Identifies the index a manifest was built against."""
+    if _backend() in ("local", "hnsw"):
+        return f"local:{os.path.abspath(_local_index_dir(generation))}"
+    if generation == DEFAULT_GENERATION:
+        return os.environ["INDEX_NAME"]
+    return f"{os.environ['INDEX_NAME']}/{generation}"
+
+
+def _open_vector_store(for_write: bool = False, generation: Optional[str] = None) -> VectorStore:
+    """Open a generation (default: the active one) of the configured backend.
     
-    if index_name not in existing_indexes:
-        pc.create_index(
-            name=index_name,
-            dimension=1536,
-            metric='cosine',
-            spec={"serverless": {"cloud": "aws", "region": "us-east-1"}}
+    For writes, make sure the Pinecone index exists.
+    """
+    if generation is None:
+        generation = load_index_pointer()["active"]
+    backend = _backend()
+    if backend == "local":
+        return LocalVectorStore.open(get_embeddings(), _local_index_dir(generation))
+    if backend == "hnsw":
+        return HNSWVectorStore.open(
+            get_embeddings(),
+            _local_index_dir(generation),
+            m=int(os.environ.get("HNSW_M", "16")),
+            ef_construction=int(os.environ.get("HNSW_EF_CONSTRUCTION", "200")),
+            ef_search=int(os.environ.get("HNSW_EF_SEARCH", "64"))
         )
-        import time
-        time.sleep(10)  # Wait for initialization
-    else:
-        # Check dimension compatibility
-        index_info = pc.describe_index(index_name)
-        if index_info.dimension != 1536:
-            pc.delete_index(index_name)
-            import time
-            time.sleep(5)
+    if backend != "pinecone":
+        raise ValueError(f"Unknown VECTOR_STORE_BACKEND: {backend}")
+    
+    from langchain_pinecone import PineconeVectorStore
+    
+    index_name = os.environ["INDEX_NAME"]
+    if for_write:
+        _ensure_index_exists(_pinecone_client(), index_name)
+    return PineconeVectorStore(
+        index=_pinecone_index(index_name), embedding=get_embeddings(), namespace=_namespace(generation)
+    )
+
+
+@lru_cache(maxsize=None)
+def _pinecone_client() -> "Pinecone":
+    """Process-wide Pinecone client so its HTTP connection pool is reused."""
+    from pinecone import Pinecone
+    
+    return Pinecone(api_key=os.environ["PINECONE_API_KEY"])
+
+
+@lru_cache(maxsize=None)
+def _pinecone_index(index_name: str):
+    """Cached data-plane handle for an index (keeps TLS connections alive between requests)."""
+    return _pinecone_client().Index(index_name, pool_threads=int(os.environ.get("PINECONE_POOL_THREADS", "4")))
+
+
+def get_index_version() -> int:
+    """Generation of the index contents, bumped after every ingest and shared by all workers."""
+    try:
+        with open(state_path("index_version"), encoding='utf-8') as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _bump_index_version() -> int:
+    version = get_index_version() + 1
+    path = state_path("index_version")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding='utf-8') as f:
+        f.write(str(version))
+    os.replace(f"{path}.tmp", path)
+    return version
+
+
+@lru_cache(maxsize=None)
+def _splitter():
+    """Text splitter shared by all ingests; splitting keeps no state between calls."""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    
+    return RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+
+
+def _split_documents(documents: List) -> List:
+    """Split documents into overlapping chunks for embedding."""
+    with INGEST_PHASE_SECONDS.time(phase="split"):
+        return _splitter().split_documents(documents)
+
+
+def _iter_chunks(documents: Iterable) -> Iterator:
+    """Split documents lazily, one document at a time."""
+    splitter = _splitter()
+    for document in documents:
+        with INGEST_PHASE_SECONDS.time(phase="split"):
+            chunks = splitter.split_documents([document])
+        yield from chunks
+
+
+def _ensure_index_exists(pc: "Pinecone", index_name: str, dimension: int = 1536) -> None:
+    """Ensure Pinecone index exists with correct configuration and is ready.
+    
+    The result is cached per process, so only the first write pays for
+    listing and describing indexes.
+    """
+    if _ready_indexes.get(index_name) == dimension:
+        return
+    
+    with _ready_lock:
+        if _ready_indexes.get(index_name) == dimension:
+            return
+        
+        existing_indexes = [idx.name for idx in pc.list_indexes()]
+        if index_name in existing_indexes and pc.describe_index(index_name).dimension != dimension:
+            logger.warning(f"Recreating index {index_name} with dimension {dimension}")
+            pc.delete_index(index_name, timeout=-1)
+            _wait_for(lambda: index_name not in [idx.name for idx in pc.list_indexes()], f"deletion of index {index_name}")
+            existing_indexes.remove(index_name)
+        
+        if index_name not in existing_indexes:
             pc.create_index(
                 name=index_name,
-                dimension=1536,
+                dimension=dimension,
                 metric='cosine',
-                spec={"serverless": {"cloud": "aws", "region": "us-east-1"}}
+                spec={"serverless": {"cloud": "aws", "region": "us-east-1"}},
+                timeout=-1
             )
-            time.sleep(10)
+        _wait_for(lambda: pc.describe_index(index_name).status["ready"], f"index {index_name} to become ready")
+        _ready_indexes[index_name] = dimension
+
+
+# Pinecone indexes known to exist and be ready in this process: {index name: dimension}
+_ready_indexes: Dict[str, int] = {}
+_ready_lock = threading.Lock()
+
+
+def _wait_for(condition: Callable[[], bool], description: str) -> None:
+    """Poll condition with exponential backoff until it holds or INDEX_READY_TIMEOUT seconds pass."""
+    deadline = time.monotonic() + float(os.environ.get("INDEX_READY_TIMEOUT", "300"))
+    delay = 0.5
+    while not condition():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Timed out waiting for {description}")
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 10.0)
@@ -0,0 +1,113 @@
+"""Persistent embedding cache keyed by model name and chunk text."""
+import asyncio
+import hashlib
+import logging
+import threading
+from array import array
+from typing import Dict, List
+from langchain.schema.embeddings import Embeddings
+from services.metrics import EMBEDDING_CACHE
+from services.sqlite_lru import SQLiteLRU
+
+logger = logging.getLogger(__name__)
+
+
+class CachedEmbeddings(Embeddings):
+    """Wrap an embeddings object with a size-bounded SQLite LRU cache.
+
+    Entries are keyed by ``sha256(model name, text)`` and stored as float32
+    blobs in a ``SQLiteLRU`` table. When the cache grows past ``max_bytes``
+    the least recently used entries are evicted. The database is shared
+    safely between threads and worker processes.
+    """
+
+    def __init__(self, underlying: Embeddings, path: str, max_bytes: int = 1024 * 1024 * 1024):
+        self.underlying = underlying
+        self.model = getattr(underlying, "model", type(underlying).__name__)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._store = SQLiteLRU(path, "embeddings", {"vector": "BLOB NOT NULL"}, max_bytes)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, calling the underlying model only for cache misses."""
+        keys = [self._key(text) for text in texts]
+        cached = self._get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            computed = dict(zip(missing, vectors))
+            self._put_many(computed)
+            cached.update(computed)
+
+        self._count(hits=len(texts) - len(missing), misses=len(missing))
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, served from the cache when the same text was seen before."""
+        key = self._key(text)
+        cached = self._get_many([key])
+        if key in cached:
+            self._count(hits=1)
+            return cached[key]
+
+        vector = self.underlying.embed_query(text)
+        self._put_many({key: vector})
+        self._count(misses=1)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async ``embed_query``: SQLite reads and writes run in a thread, a miss awaits the underlying model."""
+        key = self._key(text)
+        cached = await asyncio.to_thread(self._get_many, [key])
+        if key in cached:
+            self._count(hits=1)
+            return cached[key]
+
+        vector = await self.underlying.aembed_query(text)
+        await asyncio.to_thread(self._put_many, {key: vector})
+        self._count(misses=1)
+        return vector
+
+    def stats(self) -> Dict[str, float]:
+        """Hit and miss counters since process start."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _count(self, hits: int = 0, misses: int = 0) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+        if hits:
+            EMBEDDING_CACHE.inc(hits, result="hit")
+        if misses:
+            EMBEDDING_CACHE.inc(misses, result="miss")
+
+    def _get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        for key, (blob,) in self._store.get_many(keys).items():
+            vector = array("f")
+            vector.frombytes(blob)
+            found[key] = vector.tolist()
+        return found
+
+    def _put_many(self, vectors: Dict[str, List[float]]) -> None:
+        entries = []
+        for key, vector in vectors.items():
+            blob = array("f", vector).tobytes()
+            entries.append((key, (blob,), len(blob)))
+        self._store.put_many(entries)
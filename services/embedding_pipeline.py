@@ -0,0 +1,200 @@
+"""Batched, concurrent embedding and upsert of document chunks."""
+import time
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from services.metrics import INGEST_PHASE_SECONDS, EMBEDDING_TOKENS
+from services.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by concurrent callers.
+
+    Holds up to ``capacity`` tokens, refilled at ``rate`` tokens per second.
+    ``acquire`` blocks until enough tokens are available; a request larger
+    than the capacity waits for a full bucket and then drives it negative,
+    so oversized batches are throttled rather than rejected.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float) -> float:
+        """Take ``tokens`` from the bucket, returning the seconds spent waiting."""
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        needed = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def iter_token_batches(
+    records: Iterable[Tuple[str, dict, str]],
+    max_tokens: int,
+    max_items: int
+) -> Iterator[Tuple[List[Tuple[str, dict, str]], int]]:
+    """Group ``(text, metadata, id)`` records into batches of at most max_tokens tokens and max_items records.
+
+    Yields ``(batch, tokens)`` lazily, so only one batch is buffered at a time.
+    """
+    batch, batch_tokens = [], 0
+    for record in records:
+        tokens = count_tokens(record[0])
+        if batch and (batch_tokens + tokens > max_tokens or len(batch) >= max_items):
+            yield batch, batch_tokens
+            batch, batch_tokens = [], 0
+        batch.append(record)
+        batch_tokens += tokens
+    if batch:
+        yield batch, batch_tokens
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Whether an embedding error is an HTTP 429 (OpenAI ``RateLimitError`` or similar)."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or type(error).__name__ == "RateLimitError"
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def embed_and_upsert(
+    texts: List[str],
+    metadatas: List[dict],
+    ids: List[str],
+    embed: Callable[[List[str]], List[List[float]]],
+    upsert: Callable[[List[str], List[List[float]], List[dict], List[str]], Any],
+    **options: Any
+) -> Dict[str, float]:
+    """Embed and upsert parallel lists of texts, metadatas and ids; see ``embed_and_upsert_stream``."""
+    return embed_and_upsert_stream(zip(texts, metadatas, ids), embed, upsert, **options)
+
+
+def embed_and_upsert_stream(
+    records: Iterable[Tuple[str, dict, str]],
+    embed: Callable[[List[str]], List[List[float]]],
+    upsert: Callable[[List[str], List[List[float]], List[dict], List[str]], Any],
+    concurrency: int = 4,
+    max_batch_tokens: int = 50000,
+    max_batch_items: int = 500,
+    tokens_per_minute: float = 1000000,
+    max_retries: int = 6,
+    progress: Optional[Callable[[int], None]] = None
+) -> Dict[str, float]:
+    """Embed ``(text, metadata, id)`` records in token-budgeted batches and upsert each batch as soon as it is embedded.
+
+    Records are pulled from the iterable lazily: at most ``2 * concurrency``
+    batches are being embedded or waiting to be upserted at any time, so
+    memory is bounded by batch size rather than by the number of records.
+    Up to ``concurrency`` embedding requests run at once, all drawing from one
+    token bucket sized to ``tokens_per_minute`` (0 disables it). Upserts
+    run on their own thread in completion order, overlapping with the
+    embeddings still in flight. 429 responses are retried with full-jitter
+    exponential backoff (or the server's Retry-After); other errors abort
+    the run. ``progress`` is called with the number of records upserted so far.
+    """
+    started = time.perf_counter()
+    batches = iter_token_batches(records, max_batch_tokens, max_batch_items)
+    bucket = TokenBucket(tokens_per_minute / 60.0, capacity=max(max_batch_tokens, tokens_per_minute))
+    stats = {"chunks": 0, "batches": 0, "retries": 0, "throttled_seconds": 0.0}
+    stats_lock = threading.Lock()
+    max_in_flight = 2 * max(1, concurrency)
+
+    def embed_batch(batch: List[Tuple[str, dict, str]], tokens: int) -> List[List[float]]:
+        texts = [record[0] for record in batch]
+        for attempt in range(max_retries + 1):
+            waited = bucket.acquire(tokens)
+            try:
+                with INGEST_PHASE_SECONDS.time(phase="embed"):
+                    vectors = embed(texts)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == max_retries:
+                    raise
+                delay = _retry_after(e) or random.uniform(0, min(60.0, 0.5 * 2 ** attempt))
+                logger.warning(f"Embedding rate limited; retrying batch of {len(texts)} in {delay:.1f}s")
+                time.sleep(delay)
+                with stats_lock:
+                    stats["retries"] += 1
+                    stats["throttled_seconds"] += waited + delay
+                continue
+            with stats_lock:
+                stats["throttled_seconds"] += waited
+            EMBEDDING_TOKENS.inc(tokens)
+            return vectors
+
+    def upsert_batch(batch: List[Tuple[str, dict, str]], vectors: List[List[float]]) -> None:
+        texts, metadatas, ids = (list(column) for column in zip(*batch))
+        with INGEST_PHASE_SECONDS.time(phase="upsert"):
+            upsert(texts, vectors, metadatas, ids)
+        stats["chunks"] += len(batch)
+        if progress:
+            progress(stats["chunks"])
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="embed") as embedders, \
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="upsert") as upserter:
+        pending = {}
+        upserts = deque()
+        exhausted = False
+        try:
+            while True:
+                while upserts and upserts[0].done():
+                    upserts.popleft().result()
+                # Pull more records only while the number of batches in flight is below the bound
+                while not exhausted and len(pending) + len(upserts) < max_in_flight:
+                    item = next(batches, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    pending[embedders.submit(embed_batch, *item)] = item[0]
+                    stats["batches"] += 1
+
+                if pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        batch = pending.pop(future)
+                        upserts.append(upserter.submit(upsert_batch, batch, future.result()))
+                elif upserts and not exhausted:
+                    # Every slot is waiting on upserts: let the oldest finish before reading more
+                    upserts.popleft().result()
+                else:
+                    break
+            while upserts:
+                upserts.popleft().result()
+        except Exception:
+            for future in pending:
+                future.cancel()
+            raise
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = round(elapsed, 3)
+    stats["chunks_per_second"] = round(stats["chunks"] / elapsed, 1) if elapsed else 0.0
+    stats["throttled_seconds"] = round(stats["throttled_seconds"], 3)
+    logger.info(
+        f"Embedded {stats['chunks']} chunks in {stats['batches']} batches: "
+        f"{stats['chunks_per_second']} chunks/s, {stats['retries']} rate-limit retries"
+    )
+    return stats
@@ -0,0 +1,194 @@
+"""HNSW approximate-nearest-neighbour index on top of the local vector store."""
+import os
+import json
+import logging
+import threading
+from typing import Any, List, Optional, Tuple
+import numpy as np
+from langchain.schema.embeddings import Embeddings
+from services.local_store import LocalVectorStore
+
+logger = logging.getLogger(__name__)
+
+
+class HNSWVectorStore(LocalVectorStore):
+    """Local vector store searched through an hnswlib graph.
+
+    Rows, texts and the float32 matrix are stored exactly as in
+    ``LocalVectorStore``; graph labels are matrix row numbers. The graph is
+    persisted to ``hnsw.bin`` and only loaded on the first search or insert.
+    Rows appended since the graph was last saved (for example by another
+    process) are inserted when it loads, and deleted rows are marked deleted.
+    Small candidate sets, such as a search restricted to a few resumes, fall
+    back to exact search.
+    """
+
+    GRAPH_FILE = "hnsw.bin"
+    GRAPH_META_FILE = "hnsw.json"
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        persist_dir: str,
+        m: int = 16,
+        ef_construction: int = 200,
+        ef_search: int = 64,
+        exact_threshold: int = 2048
+    ):
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.exact_threshold = exact_threshold
+        self._graph = None
+        self._graph_rows = 0
+        self._graph_deleted = set()
+        self._marked_alive = None
+        self._unsaved_rows = 0
+        self._graph_lock = threading.RLock()
+        self._graph_path = os.path.join(persist_dir, self.GRAPH_FILE)
+        self._graph_meta_path = os.path.join(persist_dir, self.GRAPH_META_FILE)
+        super().__init__(embedding, persist_dir)
+
+    # Graph lifecycle
+
+    def _ensure_graph(self):
+        """Load (or build) the graph and catch it up with the row log."""
+        try:
+            import hnswlib
+        except ImportError as e:
+            raise ImportError("VECTOR_STORE_BACKEND=hnsw requires hnswlib: pip install hnswlib") from e
+
+        with self._graph_lock:
+            matrix, alive = self._matrix, self._alive
+            if self._graph is None and self._dimension:
+                self._graph = self._load_graph(hnswlib)
+            if self._graph is None:
+                return None
+
+            if self._graph_rows < len(matrix):
+                self._insert_rows(matrix, self._graph_rows, len(matrix))
+            if alive is not self._marked_alive:
+                self._mark_deleted(alive)
+
+            if self._unsaved_rows > max(1000, self._graph_rows // 10):
+                self._save_graph()
+            return self._graph
+
+    def _load_graph(self, hnswlib):
+        graph = hnswlib.Index(space="ip", dim=self._dimension)
+        params = {"m": self.m, "ef_construction": self.ef_construction, "dim": self._dimension}
+        try:
+            with open(self._graph_meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["params"] != params or meta["rows"] > len(self._ids):
+                raise ValueError("graph parameters or rows changed")
+            graph.load_index(self._graph_path, max_elements=max(meta["rows"], len(self._ids)) * 2)
+            self._graph_rows = meta["rows"]
+            logger.info(f"Loaded HNSW graph with {self._graph_rows} rows from {self._graph_path}")
+        except (OSError, ValueError, KeyError, RuntimeError) as e:
+            logger.info(f"Building HNSW graph for {self.persist_dir} ({e})")
+            graph.init_index(max_elements=max(1024, len(self._ids) * 2), M=self.m, ef_construction=self.ef_construction)
+            self._graph_rows = 0
+        self._graph_deleted = set()
+        self._marked_alive = None
+        self._unsaved_rows = 0
+        graph.set_ef(self.ef_search)
+        return graph
+
+    def _mark_deleted(self, alive: np.ndarray) -> None:
+        for row in np.flatnonzero(~alive[:self._graph_rows]):
+            if row not in self._graph_deleted:
+                try:
+                    self._graph.mark_deleted(int(row))
+                except RuntimeError:
+                    pass  # already marked in the saved graph
+                self._graph_deleted.add(row)
+        self._marked_alive = alive
+
+    def _insert_rows(self, matrix: np.ndarray, start: int, stop: int) -> None:
+        if self._graph.get_max_elements() < stop:
+            self._graph.resize_index(max(stop, self._graph.get_max_elements() * 2))
+        self._graph.add_items(np.ascontiguousarray(matrix[start:stop]), np.arange(start, stop))
+        self._graph_rows = stop
+        self._unsaved_rows += stop - start
+
+    def persist(self) -> None:
+        """Bring the graph up to date and save it so serving processes load it instead of rebuilding."""
+        with self._graph_lock:
+            if self._ensure_graph() is not None and self._unsaved_rows:
+                self._save_graph()
+
+    def _save_graph(self) -> None:
+        with self._graph_lock:
+            tmp_path = f"{self._graph_path}.tmp"
+            self._graph.save_index(tmp_path)
+            os.replace(tmp_path, self._graph_path)
+            params = {"m": self.m, "ef_construction": self.ef_construction, "dim": self._dimension}
+            with open(self._graph_meta_path, "w", encoding="utf-8") as f:
+                json.dump({"rows": self._graph_rows, "params": params}, f)
+            self._unsaved_rows = 0
+
+    def _load(self) -> None:
+        # Rows may have been renumbered by a compaction in another process
+        with self._graph_lock:
+            self._graph = None
+        super()._load()
+
+    def _drop_graph(self) -> None:
+        with self._graph_lock:
+            self._graph = None
+            self._graph_rows = 0
+            self._graph_deleted = set()
+            self._marked_alive = None
+            for path in (self._graph_path, self._graph_meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    # Writes keep the loaded graph in step with the rows
+
+    def add_embeddings(self, texts, embeddings, metadatas=None, ids=None) -> List[str]:
+        ids = super().add_embeddings(texts, embeddings, metadatas, ids)
+        if self._graph is not None:
+            self._ensure_graph()
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        result = super().delete(ids, **kwargs)
+        if self._graph is not None:
+            self._ensure_graph()
+        return result
+
+    def delete_all(self) -> None:
+        self._drop_graph()
+        super().delete_all()
+
+    def compact(self) -> None:
+        # Row numbers change, so the graph is rebuilt on next use
+        self._drop_graph()
+        super().compact()
+
+    # Search
+
+    def _rank(self, matrix: np.ndarray, mask: np.ndarray, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        selected = int(mask.sum())
+        if selected <= max(k, self.exact_threshold):
+            return super()._rank(matrix, mask, query, k)
+
+        results = []
+        fetch = 2 * k + 8
+        with self._graph_lock:
+            graph = self._ensure_graph()
+            available = self._graph_rows - len(self._graph_deleted)
+            while True:
+                # Over-fetch so rows excluded by the mask still leave k results
+                fetch = min(fetch, available)
+                graph.set_ef(max(self.ef_search, fetch))
+                labels, distances = graph.knn_query(query, k=fetch)
+                results = [
+                    (int(row), float(1.0 - distance))
+                    for row, distance in zip(labels[0], distances[0])
+                    if row < len(mask) and mask[row]
+                ]
+                if len(results) >= k or fetch >= available:
+                    return results[:k]
+                fetch *= 4
@@ -0,0 +1,169 @@
+"""Manifest of indexed files used for incremental re-indexing, the index generation pointer and write lock."""
+import os
+import json
+import time
+import fcntl
+import hashlib
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def state_path(*parts: str) -> str:
+    """Path inside the local index state directory (INDEX_STATE_DIR)."""
+    return os.path.join(os.environ.get("INDEX_STATE_DIR", ".index_state"), *parts)
+
+
+# Generation that lives in the unversioned index location (default namespace / index directory)
+DEFAULT_GENERATION = "default"
+
+
+def default_manifest_path(generation: str = DEFAULT_GENERATION) -> str:
+    """Location of a generation's manifest inside the local index state directory."""
+    if generation == DEFAULT_GENERATION:
+        return state_path("manifest.json")
+    return state_path("manifests", f"{generation}.json")
+
+
+@contextmanager
+def index_write_lock() -> Iterator[None]:
+    """Hold ``INDEX_STATE_DIR/index.lock`` exclusively while writing the index.
+
+    The lock is an ``flock`` on a shared file, so it serializes writers across
+    threads and worker processes alike; it is released if the holder dies.
+    Also usable as a decorator.
+    """
+    path = state_path("index.lock")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def index_write_locked() -> bool:
+    """Whether some thread or process currently holds the index write lock."""
+    path = state_path("index.lock")
+    if not os.path.exists(path):
+        return False
+    with open(path, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(f, fcntl.LOCK_UN)
+        return False
+
+
+def load_index_pointer() -> Dict[str, Optional[str]]:
+    """Return ``{"active": generation, "previous": generation or None}``.
+
+    ``active`` is the generation served to chat; ``previous`` is the one it
+    replaced, kept for rollback. Without a pointer file the unversioned
+    default generation is active.
+    """
+    try:
+        with open(state_path("index_pointer.json"), encoding='utf-8') as f:
+            data = json.load(f)
+        return {"active": data.get("active") or DEFAULT_GENERATION, "previous": data.get("previous")}
+    except FileNotFoundError:
+        return {"active": DEFAULT_GENERATION, "previous": None}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable index pointer: {e}")
+        return {"active": DEFAULT_GENERATION, "previous": None}
+
+
+def save_index_pointer(active: str, previous: Optional[str]) -> None:
+    """Atomically point serving at ``active``, remembering ``previous`` for rollback."""
+    path = state_path("index_pointer.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.tmp", "w", encoding='utf-8') as f:
+        json.dump({"active": active, "previous": previous, "updated_at": time.time()}, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def new_generation(pointer: Dict[str, Optional[str]]) -> str:
+    """Unique, time-ordered name for a generation that is about to be built."""
+    name = time.strftime("gen-%Y%m%d-%H%M%S")
+    suffix = 1
+    while name in pointer.values():
+        suffix += 1
+        name = f"{time.strftime('gen-%Y%m%d-%H%M%S')}-{suffix}"
+    return name
+
+
+def load_manifest(path: str, index_name: str) -> Dict[str, dict]:
+    """Load the ``{file path: entry}`` manifest recorded for index_name.
+
+    Each entry holds the file's size, mtime, sha256 and upserted chunk IDs.
+    A missing, unreadable or foreign manifest is treated as empty.
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable manifest {path}: {e}")
+        return {}
+
+    if data.get("index") != index_name:
+        logger.info(f"Manifest {path} belongs to index {data.get('index')!r}; starting fresh")
+        return {}
+    return data.get("files", {})
+
+
+def save_manifest(manifest: Dict[str, dict], path: str, index_name: str) -> None:
+    """Atomically write the manifest for index_name."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding='utf-8') as f:
+        json.dump({"index": index_name, "files": manifest}, f)
+    os.replace(tmp_path, path)
+
+
+def file_sha256(file_path: str) -> str:
+    """Hash file contents in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def diff_manifest(manifest: Dict[str, dict], files: List[str]) -> Tuple[Dict[str, dict], List[str]]:
+    """Compare files on disk against the manifest.
+
+    Returns ``(changed, deleted)``: fingerprints of new or modified files keyed
+    by absolute path, and manifest paths that no longer exist. Files whose size
+    and mtime match are not read; files that were touched but whose content hash
+    is unchanged only get their manifest mtime refreshed in place.
+    """
+    changed = {}
+    seen = set()
+    for file_path in files:
+        key = os.path.abspath(file_path)
+        seen.add(key)
+        stat = os.stat(file_path)
+        entry = manifest.get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            continue
+
+        sha256 = file_sha256(file_path)
+        if entry and entry["sha256"] == sha256:
+            entry["mtime"] = stat.st_mtime
+            continue
+        changed[key] = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": sha256}
+
+    deleted = [key for key in manifest if key not in seen]
+    return changed, deleted
+
+
+def chunk_ids(file_path: str, sha256: str, count: int) -> List[str]:
+    """Deterministic vector IDs for the chunks of one version of a file."""
+    prefix = hashlib.sha1(os.path.abspath(file_path).encode("utf-8")).hexdigest()[:16]
+    return [f"{prefix}-{sha256[:16]}-{i}" for i in range(count)]
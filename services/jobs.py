@@ -0,0 +1,172 @@
+"""Background job runner for long-running ingests."""
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """Status and progress counters of one background job.
+
+    The job function receives the job and reports progress through
+    ``update(phase=..., files_parsed=..., ...)``; readers get a consistent
+    snapshot with derived throughput and ETA from ``to_dict``. Throughput
+    is measured over the ingest phase and kept once the job moves past it.
+    When ``path`` is set, that snapshot is also written there as JSON, at most
+    once a second and on every status change.
+    """
+
+    def __init__(self, name: str, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.params = params
+        self.status = "queued"
+        self.phase = "queued"
+        self.files_total = 0
+        self.files_parsed = 0
+        self.chunks_total = 0
+        self.chunks_embedded = 0
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.phase_started_at: Optional[float] = None
+        self.ingest_seconds: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.path: Optional[str] = None
+        self._lock = threading.Lock()
+        self._saved_at = 0.0
+
+    def update(self, **fields: Any) -> None:
+        """Record progress; changing phase restarts the phase timer used for throughput."""
+        with self._lock:
+            if "phase" in fields and fields["phase"] != self.phase:
+                now = time.time()
+                if self.phase == "ingest" and self.phase_started_at:
+                    self.ingest_seconds = now - self.phase_started_at
+                self.phase_started_at = now
+            for name, value in fields.items():
+                setattr(self, name, value)
+            due = "status" in fields or time.time() - self._saved_at >= 1.0
+        if due:
+            self.save()
+
+    def save(self) -> None:
+        """Write the status snapshot to ``path`` atomically; failures are logged, not raised."""
+        if not self.path:
+            return
+        self._saved_at = time.time()
+        try:
+            with open(f"{self.path}.tmp", "w", encoding='utf-8') as f:
+                json.dump(self.to_dict(), f)
+            os.replace(f"{self.path}.tmp", self.path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not save status of job {self.id}: {e}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self.finished_at or time.time()
+            elapsed = now - self.started_at if self.started_at else 0.0
+            phase_elapsed = now - self.phase_started_at if self.phase_started_at else 0.0
+
+            # Files are parsed, embedded and upserted together during the ingest phase
+            ingesting = self.phase == "ingest"
+            ingest_seconds = phase_elapsed if ingesting else self.ingest_seconds
+            files_per_second = self.files_parsed / ingest_seconds if ingest_seconds else 0.0
+            chunks_per_second = self.chunks_embedded / ingest_seconds if ingest_seconds else 0.0
+            eta = None
+            if ingesting and files_per_second:
+                eta = (self.files_total - self.files_parsed) / files_per_second
+
+            return {
+                "id": self.id,
+                "name": self.name,
+                "params": self.params,
+                "status": self.status,
+                "phase": self.phase,
+                "files_total": self.files_total,
+                "files_parsed": self.files_parsed,
+                "chunks_total": self.chunks_total,
+                "chunks_embedded": self.chunks_embedded,
+                "elapsed_seconds": round(elapsed, 2),
+                "files_per_second": round(files_per_second, 2),
+                "chunks_per_second": round(chunks_per_second, 2),
+                "eta_seconds": round(eta, 1) if eta is not None else None,
+                "result": self.result,
+                "error": self.error
+            }
+
+
+class JobRunner:
+    """Runs jobs on a small thread pool and keeps the most recent ones for status queries.
+
+    With the default single worker, jobs run one at a time in submission order.
+    With a ``directory``, job statuses are also saved there, so any process
+    sharing it can report a job that another process is running.
+    """
+
+    def __init__(self, max_workers: int = 1, history: int = 50, directory: Optional[str] = None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._history = history
+        self._directory = directory
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def submit(self, name: str, fn: Callable[..., Any], **params: Any) -> Job:
+        """Queue ``fn(job, **params)`` and return its job immediately."""
+        job = Job(name, params)
+        if self._directory:
+            job.path = os.path.join(self._directory, f"{job.id}.json")
+            job.save()
+            self._prune_saved()
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self._history:
+                self._jobs.popitem(last=False)
+        self._executor.submit(self._run, job, fn, params)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status snapshot of a job run by this process, or saved by another one."""
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if not self._directory or not job_id.isalnum():
+            return None
+        try:
+            with open(os.path.join(self._directory, f"{job_id}.json"), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _prune_saved(self) -> None:
+        """Keep the statuses of the ``history`` most recent jobs on disk."""
+        try:
+            paths = [entry.path for entry in os.scandir(self._directory) if entry.name.endswith(".json")]
+            paths.sort(key=os.path.getmtime)
+            for path in paths[:-self._history]:
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"Could not prune saved job statuses: {e}")
+
+    def _run(self, job: Job, fn: Callable[..., Any], params: Dict[str, Any]) -> None:
+        job.update(status="running", phase="starting", started_at=time.time())
+        try:
+            result = fn(job, **params)
+            job.update(status="succeeded", phase="done", result=result, finished_at=time.time())
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.name}) failed: {e}")
+            job.update(status="failed", error=str(e), finished_at=time.time())
@@ -0,0 +1,357 @@
+"""Local in-process vector store backed by a memory-mapped float32 matrix."""
+import os
+import json
+import shutil
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain.schema import Document
+from langchain.schema.embeddings import Embeddings
+from langchain.schema.vectorstore import VectorStore
+
+logger = logging.getLogger(__name__)
+
+
+class LocalVectorStore(VectorStore):
+    """Exact cosine search over a memory-mapped float32 matrix.
+
+    ``vectors.f32`` holds L2-normalised rows appended in insertion order and
+    ``rows.jsonl`` is an append-only log of adds (id, text, metadata) and
+    deletes. Search is a single matrix-vector product followed by
+    ``argpartition``. Use ``open`` to share one instance per directory; it
+    picks up rows appended by other processes before each search. Writes are
+    expected from one process at a time (the ingest job).
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    ROWS_FILE = "rows.jsonl"
+
+    _instances: Dict[str, "LocalVectorStore"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, embedding: Embeddings, persist_dir: str):
+        self._embedding = embedding
+        self.persist_dir = persist_dir
+        self._vectors_path = os.path.join(persist_dir, self.VECTORS_FILE)
+        self._rows_path = os.path.join(persist_dir, self.ROWS_FILE)
+        self._lock = threading.RLock()
+        os.makedirs(persist_dir, exist_ok=True)
+        self._load()
+
+    @classmethod
+    def open(cls, embedding: Embeddings, persist_dir: str, **kwargs: Any) -> "LocalVectorStore":
+        """Return the shared store for persist_dir, creating it on first use."""
+        key = os.path.abspath(persist_dir)
+        with cls._instances_lock:
+            store = cls._instances.get(key)
+            if store is None or type(store) is not cls or store._embedding is not embedding:
+                store = cls(embedding, persist_dir, **kwargs)
+                cls._instances[key] = store
+            return store
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def count(self) -> int:
+        """Number of live rows."""
+        return int(self._alive.sum())
+
+    # Loading and persistence
+
+    def _load(self) -> None:
+        with self._lock:
+            self._dimension: Optional[int] = None
+            self._ids: List[Optional[str]] = []
+            self._texts: List[str] = []
+            self._metadatas: List[dict] = []
+            self._row_of: Dict[str, int] = {}
+            self._alive_buffer = np.zeros(0, dtype=bool)
+            self._alive = self._alive_buffer
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+            self._rows_offset = 0
+            self._rows_inode = None
+            self._replay()
+
+    def refresh(self) -> None:
+        """Apply rows appended by other processes since the last load."""
+        try:
+            stat = os.stat(self._rows_path)
+        except FileNotFoundError:
+            if self._ids:
+                self._load()
+            return
+        if stat.st_ino != self._rows_inode or stat.st_size < self._rows_offset:
+            self._load()
+        elif stat.st_size != self._rows_offset:
+            with self._lock:
+                self._replay()
+
+    def _replay(self) -> None:
+        """Read new entries from the row log and remap the vector file."""
+        if not os.path.exists(self._rows_path):
+            return
+        start, dead = len(self._ids), []
+        with open(self._rows_path, "rb") as f:
+            self._rows_inode = os.fstat(f.fileno()).st_ino
+            f.seek(self._rows_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partially written entry; picked up by the next refresh
+                self._rows_offset += len(line)
+                entry = json.loads(line)
+                if entry["op"] == "add":
+                    self._dimension = entry["dim"]
+                    replaced = self._append_row(entry["id"], entry["text"], entry["metadata"])
+                    if replaced is not None:
+                        dead.append(replaced)
+                elif entry["id"] in self._row_of:
+                    row = self._row_of.pop(entry["id"])
+                    self._ids[row] = None
+                    dead.append(row)
+        self._update_alive(start, dead)
+        self._remap()
+
+    def _update_alive(self, start: int, dead: List[int]) -> None:
+        """Extend the live-row mask with the rows from ``start`` on.
+        
+        Appends fill spare capacity of the mask's buffer, so adding a batch
+        costs O(batch), not O(rows). Readers keep the previous mask, a
+        shorter view of the same buffer that never covers the new rows.
+        Deletes and replacements copy into a new buffer instead, so a mask a
+        reader holds never changes under it.
+        """
+        rows = len(self._ids)
+        if dead or rows > len(self._alive_buffer):
+            buffer = np.zeros(max(1024, 2 * rows), dtype=bool)
+            buffer[:start] = self._alive_buffer[:start]
+            buffer[dead] = False
+            self._alive_buffer = buffer
+        self._alive_buffer[start:rows] = [row_id is not None for row_id in self._ids[start:rows]]
+        self._alive = self._alive_buffer[:rows]
+
+    def _append_row(self, row_id: str, text: str, metadata: dict) -> Optional[int]:
+        """Add a row; returns the row it replaces, if the ID was already present."""
+        replaced = self._row_of.get(row_id)
+        if replaced is not None:
+            self._ids[replaced] = None
+        self._row_of[row_id] = len(self._ids)
+        self._ids.append(row_id)
+        self._texts.append(text)
+        self._metadatas.append(metadata)
+        return replaced
+
+    def _remap(self) -> None:
+        rows = len(self._ids)
+        if not rows or not self._dimension:
+            self._matrix = np.zeros((0, self._dimension or 0), dtype=np.float32)
+            return
+        self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dimension))
+
+    # Writes
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        """Embed and add texts, replacing any existing rows with the same IDs."""
+        texts = list(texts)
+        return self.add_embeddings(texts, self._embedding.embed_documents(texts), metadatas, ids)
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Add precomputed embeddings."""
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [os.urandom(12).hex() for _ in texts]
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+
+        with self._lock:
+            self.refresh()
+            if self._dimension is None:
+                self._dimension = vectors.shape[1]
+            elif vectors.shape[1] != self._dimension:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self._dimension}")
+
+            # Vectors first: a row entry is only valid once its vector is on disk
+            self._truncate_vectors(len(self._ids))
+            with open(self._vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            lines = [
+                json.dumps({"op": "add", "id": row_id, "dim": self._dimension, "text": text, "metadata": metadata})
+                for row_id, text, metadata in zip(ids, texts, metadatas)
+            ]
+            self._append_log(lines)
+        return list(ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Delete rows by ID."""
+        if not ids:
+            return False
+        with self._lock:
+            self.refresh()
+            self._append_log([json.dumps({"op": "delete", "id": row_id}) for row_id in ids if row_id in self._row_of])
+            if len(self._ids) > 1000 and self.count() < len(self._ids) // 2:
+                self.compact()
+        return True
+
+    def delete_all(self) -> None:
+        """Remove every row."""
+        with self._lock:
+            for path in (self._vectors_path, self._rows_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._load()
+
+    def destroy(self) -> None:
+        """Delete the store's directory and stop sharing this instance."""
+        self.delete_all()
+        key = os.path.abspath(self.persist_dir)
+        with self._instances_lock:
+            if self._instances.get(key) is self:
+                del self._instances[key]
+        shutil.rmtree(self.persist_dir, ignore_errors=True)
+
+    def persist(self) -> None:
+        """Flush derived structures to disk; rows and vectors are written through."""
+
+    def compact(self) -> None:
+        """Rewrite the files without deleted rows."""
+        with self._lock:
+            rows = np.flatnonzero(self._alive)
+            tmp_vectors, tmp_rows = f"{self._vectors_path}.tmp", f"{self._rows_path}.tmp"
+            with open(tmp_vectors, "wb") as f:
+                f.write(np.ascontiguousarray(self._matrix[rows]).tobytes())
+            with open(tmp_rows, "w", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps({
+                        "op": "add", "id": self._ids[row], "dim": self._dimension,
+                        "text": self._texts[row], "metadata": self._metadatas[row]
+                    }) + "\n")
+            os.replace(tmp_vectors, self._vectors_path)
+            os.replace(tmp_rows, self._rows_path)
+            logger.info(f"Compacted {self.persist_dir} to {len(rows)} rows")
+            self._load()
+
+    def _append_log(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        with open(self._rows_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        self._replay()
+
+    def _truncate_vectors(self, rows: int) -> None:
+        """Drop vectors left behind by an interrupted write."""
+        if os.path.exists(self._vectors_path):
+            size = rows * (self._dimension or 0) * 4
+            if os.path.getsize(self._vectors_path) > size:
+                os.truncate(self._vectors_path, size)
+
+    # Search
+
+    def _snapshot(self) -> Tuple[np.ndarray, np.ndarray, List[Optional[str]], List[str], List[dict]]:
+        """Consistent view of the index for a reader; compaction swaps in new objects."""
+        self.refresh()
+        with self._lock:
+            return self._matrix, self._alive, self._ids, self._texts, self._metadatas
+
+    def matrix_view(self) -> Tuple[np.ndarray, np.ndarray, List[str], List[dict]]:
+        """Current ``(matrix, alive mask, texts, metadatas)`` for scoring every row at once.
+
+        Rows of the matrix are L2-normalised, so ``matrix @ unit_query`` gives
+        cosine similarities; rows where ``alive`` is False are deleted.
+        """
+        matrix, alive, _, texts, metadatas = self._snapshot()
+        return matrix, alive, texts, metadatas
+
+    def search_ids(self, embedding: List[float], k: int = 4) -> List[Tuple[str, float]]:
+        """Top-k ``(id, cosine similarity)`` pairs for a query vector."""
+        return [(row_id, score) for row_id, _, score in self._search(embedding, k)]
+
+    def _search(
+        self,
+        embedding: List[float],
+        k: int,
+        row_mask: Optional[np.ndarray] = None
+    ) -> List[Tuple[str, Document, float]]:
+        """Top-k ``(id, document, score)`` hits, optionally restricted to row_mask."""
+        matrix, alive, ids, texts, metadatas = self._snapshot()
+        if not len(matrix):
+            return []
+        if row_mask is not None and len(row_mask) < len(alive):
+            # Rows appended after the mask was built are outside it
+            row_mask = np.concatenate([row_mask, np.zeros(len(alive) - len(row_mask), dtype=bool)])
+        mask = alive if row_mask is None else alive & row_mask[:len(alive)]
+        query = _normalize(np.asarray(embedding, dtype=np.float32)[None, :])[0]
+        return [
+            (ids[row], Document(page_content=texts[row], metadata=metadatas[row]), score)
+            for row, score in self._rank(matrix, mask, query, k)
+        ]
+
+    def _rank(self, matrix: np.ndarray, mask: np.ndarray, query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Exact top-k rows by cosine similarity among rows selected by mask."""
+        k = min(k, int(mask.sum()))
+        if k <= 0:
+            return []
+        scores = matrix @ query
+        scores[~mask] = -np.inf
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k=k)
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return [(doc, score) for _, doc, score in self._search(self._embedding.embed_query(query), k)]
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        row_mask: Optional[np.ndarray] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        """Top-k documents for a query vector; ``row_mask`` restricts the search to the selected matrix rows."""
+        return [doc for _, doc, _ in self._search(embedding, k, row_mask)]
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        row_mask: Optional[np.ndarray] = None
+    ) -> List[Tuple[Document, float]]:
+        return [(doc, score) for _, doc, score in self._search(embedding, k, row_mask)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        persist_dir: str = "local_index",
+        **kwargs: Any
+    ) -> "LocalVectorStore":
+        store = cls.open(embedding, persist_dir)
+        store.add_texts(texts, metadatas, ids)
+        return store
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
@@ -0,0 +1,223 @@
+"""In-process metrics exported in the Prometheus text format."""
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    """A named metric family with one value per combination of label values."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, values: LabelValues, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = list(zip(self.labelnames, values)) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (f'{name}="{_escape(value)}"' for name, value in pairs)
+        return "{" + ",".join(escaped) + "}"
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(_Metric):
+    """Monotonically increasing total."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in values]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, such as requests in flight."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """Count the block as in progress while it runs."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in values]
+
+
+class Histogram(_Metric):
+    """Distribution of observations (seconds by default) in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, totals = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            totals[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the wall-clock duration of the block, also when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), totals[0])) for key, (counts, totals) in self._series.items())
+        lines = []
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f"{self.name}_bucket{self._format_labels(key, (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+def timed_iter(iterable, histogram: Histogram, **labels: str):
+    """Yield from iterable, observing how long each item took to produce."""
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        histogram.observe(time.perf_counter() - started, **labels)
+        yield item
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+REGISTRY: List[_Metric] = []
+
+# Chat
+CHAT_STAGE_SECONDS = Histogram(
+    "chat_stage_seconds", "Time spent in each stage of answering a chat question.", ["stage"]
+)
+CHAT_ERRORS = Counter(
+    "chat_errors_total", "Chat questions that failed, by the stage that raised (other: outside the timed stages).", ["stage"]
+)
+CHAT_ANSWER_CACHE = Counter(
+    "chat_answer_cache_requests_total", "Answer cache lookups by result (hit or miss).", ["result"]
+)
+CHAT_COALESCED = Counter(
+    "chat_coalesced_requests_total", "Chat requests answered by waiting on an identical question already in flight."
+)
+CHAT_CONTEXT_TOKENS = Counter(
+    "chat_context_tokens_total", "Context tokens retrieved and sent to the LLM after packing.", ["kind"]
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "Tokens used by the chat model (estimated for streamed answers), by prompt or completion.", ["type"]
+)
+COMPLETION_CACHE = Counter(
+    "completion_cache_requests_total", "Completion cache lookups by result (hit or miss).", ["result"]
+)
+COMPLETION_CACHE_SAVED_TOKENS = Counter(
+    "completion_cache_saved_tokens_total", "Prompt and completion tokens not spent thanks to completion cache hits."
+)
+COMPLETION_CACHE_SAVED_DOLLARS = Counter(
+    "completion_cache_saved_dollars_total", "Estimated USD not spent thanks to completion cache hits."
+)
+
+# Embeddings
+EMBEDDING_CACHE = Counter(
+    "embedding_cache_requests_total", "Embedding cache lookups by result (hit or miss).", ["result"]
+)
+EMBEDDING_TOKENS = Counter("embedding_tokens_total", "Tokens sent to the embedding model during ingest.")
+
+# Ingest
+INGEST_PHASE_SECONDS = Histogram(
+    "ingest_phase_seconds",
+    "Time per unit of ingest work: load per file, split per file (per document in create_vector_store), "
+    "embed and upsert per batch.",
+    ["phase"]
+)
+INGEST_JOBS = Counter("ingest_jobs_total", "Finished ingest jobs by status.", ["status"])
+
+# HTTP
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by endpoint and status code.", ["endpoint", "status"])
+HTTP_REQUEST_SECONDS = Histogram("http_request_seconds", "HTTP request duration by endpoint.", ["endpoint"])
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served, by endpoint.", ["endpoint"])
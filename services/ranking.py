@@ -0,0 +1,136 @@
+"""Rank candidates against a job description by pooling chunk similarities per resume."""
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+import numpy as np
+from services.local_store import LocalVectorStore
+
+POOLING_MODES = ("max", "mean", "top_m")
+SUMMARY_CHARS = 500
+
+
+class CandidateRanker:
+    """Scores a query vector against every chunk and pools the scores per candidate.
+
+    A candidate is the ``source`` path the loaders put in each chunk's
+    metadata. Live rows are grouped by candidate once, when the ranker is
+    built; a query is then one matrix-vector product over the stored matrix
+    followed by per-group reductions, with no Python loop over chunks.
+    """
+
+    def __init__(self, store: LocalVectorStore):
+        matrix, alive, texts, metadatas = store.matrix_view()
+        rows = np.flatnonzero(alive)
+        sources = np.array([str(metadatas[row].get("source", "")) for row in rows], dtype=object)
+        self.sources, codes = np.unique(sources, return_inverse=True)
+
+        order = np.argsort(codes, kind="stable")
+        self.matrix = matrix
+        self.texts = texts
+        self.rows = rows[order]
+        self.codes = codes[order]
+        self.starts = np.searchsorted(self.codes, np.arange(len(self.sources)))
+        self.counts = np.diff(np.append(self.starts, len(self.rows)))
+        self.group_of = {source: group for group, source in enumerate(self.sources)}
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def _group_rows(self, group: int) -> np.ndarray:
+        """Matrix rows of a candidate's chunks, in insertion (document) order."""
+        return self.rows[self.starts[group]:self.starts[group] + self.counts[group]]
+
+    def row_mask(self, sources: Iterable[str]) -> np.ndarray:
+        """Boolean mask over matrix rows selecting the chunks of the given candidates."""
+        mask = np.zeros(len(self.matrix), dtype=bool)
+        for source in sources:
+            group = self.group_of.get(source)
+            if group is not None:
+                mask[self._group_rows(group)] = True
+        return mask
+
+    def profiles(self, sources: Iterable[str]) -> Iterator[Tuple[str, np.ndarray, str, int]]:
+        """``(source, pooled vector, summary, chunks)`` for each given candidate that has chunks.
+
+        The pooled vector is the normalised mean of the candidate's chunk
+        vectors; the summary is the opening of their first chunk.
+        """
+        for source in sources:
+            group = self.group_of.get(source)
+            if group is None:
+                continue
+            rows = self._group_rows(group)
+            vector = self.matrix[rows].mean(axis=0)
+            yield source, vector / (np.linalg.norm(vector) or 1.0), self.texts[rows[0]][:SUMMARY_CHARS], len(rows)
+
+    def rank(self, query_vector: List[float], top_n: int = 10, pooling: str = "max", top_m: int = 3) -> List[dict]:
+        """Best ``top_n`` candidates for the query, highest pooled cosine similarity first.
+
+        ``max`` takes each candidate's best chunk, ``mean`` averages all of
+        their chunks and ``top_m`` averages their ``top_m`` best chunks.
+        """
+        if pooling not in POOLING_MODES:
+            raise ValueError(f"Unknown pooling {pooling!r}; expected one of {', '.join(POOLING_MODES)}")
+        if not len(self.sources) or top_n < 1:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = (self.matrix @ query)[self.rows]
+
+        if pooling == "max":
+            pooled = np.maximum.reduceat(scores, self.starts)
+        elif pooling == "mean":
+            pooled = np.add.reduceat(scores, self.starts) / self.counts
+        else:
+            # Sort by candidate, then by descending score; keep each group's first top_m entries
+            order = np.lexsort((-scores, self.codes))
+            rank_in_group = np.arange(len(order)) - self.starts[self.codes[order]]
+            kept = order[rank_in_group < top_m]
+            pooled = np.bincount(self.codes[kept], weights=scores[kept], minlength=len(self.sources))
+            pooled = pooled / np.minimum(self.counts, top_m)
+
+        top = np.arange(len(pooled))
+        if len(top) > top_n:
+            top = np.argpartition(-pooled, top_n - 1)[:top_n]
+        top = top[np.argsort(-pooled[top], kind="stable")]
+
+        results = []
+        for group in top:
+            start, end = self.starts[group], self.starts[group] + self.counts[group]
+            best = start + int(np.argmax(scores[start:end]))
+            results.append({
+                "source": self.sources[group],
+                "candidate": os.path.basename(self.sources[group]),
+                "score": round(float(pooled[group]), 4),
+                "chunks": int(self.counts[group]),
+                "best_match": {
+                    "content": self.texts[self.rows[best]][:300],
+                    "score": round(float(scores[best]), 4)
+                }
+            })
+        return results
+
+
+def rank_candidates(job_description: str, runtime, top_n: int = 10, pooling: str = "max", top_m: int = 3) -> Dict[str, Any]:
+    """Shortlist candidates for a job description without calling the LLM.
+
+    The description is embedded once (through the embedding cache) and
+    scored against every chunk of the runtime's index generation.
+    """
+    if not runtime or runtime.ranker is None:
+        raise ValueError("Candidate ranking not available")
+    if pooling not in POOLING_MODES:
+        raise ValueError(f"Unknown pooling {pooling!r}; expected one of {', '.join(POOLING_MODES)}")
+
+    started = time.perf_counter()
+    vector = runtime.vectorstore.embeddings.embed_query(job_description)
+    embedded = time.perf_counter()
+    candidates = runtime.ranker.rank(vector, top_n=top_n, pooling=pooling, top_m=top_m)
+    ranked = time.perf_counter()
+    return {
+        "candidates": candidates,
+        "candidates_total": len(runtime.ranker),
+        "pooling": pooling,
+        "timings_ms": {"embed": round((embedded - started) * 1000, 2), "rank": round((ranked - embedded) * 1000, 2)}
+    }
@@ -0,0 +1,101 @@
+"""Keyword, hybrid (BM25 + vector) and two-stage candidate retrievers."""
+from typing import Dict, List, Tuple
+from langchain.schema import BaseRetriever, Document
+from langchain.schema.vectorstore import VectorStore
+from langchain.callbacks.manager import CallbackManagerForRetrieverRun
+from services.bm25_index import BM25Index
+from services.local_store import LocalVectorStore
+from services.ranking import CandidateRanker
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int = 60) -> List[Document]:
+    """Merge ranked lists by summing ``1 / (k + rank)``; a chunk is identified by source and text."""
+    scores: Dict[Tuple[str, str], float] = {}
+    documents: Dict[Tuple[str, str], Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            key = (str(doc.metadata.get("source", "")), doc.page_content)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(key, doc)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class KeywordRetriever(BaseRetriever):
+    """Top-k chunks by BM25 score."""
+
+    index: BM25Index
+    k: int = 5
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return [doc for doc, _ in self.index.search(query, self.k)]
+
+
+class HybridRetriever(BaseRetriever):
+    """Fuses vector and BM25 rankings with reciprocal rank fusion.
+
+    Each side fetches ``fetch_k`` candidates; exact keyword matches such as
+    a certification or a candidate's name that the embedding ranks low are
+    pulled up by their BM25 rank, and vice versa.
+    """
+
+    vectorstore: VectorStore
+    index: BM25Index
+    k: int = 5
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.search_by_vector(query, self.vectorstore.embeddings.embed_query(query))
+
+    def search_by_vector(self, query: str, embedding: List[float]) -> List[Document]:
+        """Hybrid search with the query's precomputed embedding."""
+        vector_docs = self.vectorstore.similarity_search_by_vector(embedding, k=self.fetch_k)
+        keyword_docs = [doc for doc, _ in self.index.search(query, self.fetch_k)]
+        return reciprocal_rank_fusion([vector_docs, keyword_docs], self.rrf_k)[:self.k]
+
+
+class CandidateRetriever(BaseRetriever):
+    """Two-stage retrieval: pick candidates first, then their best chunks.
+
+    The query is matched against the candidate index (one pooled vector per
+    resume) to choose ``candidates_k`` candidates, and the chunk search is
+    restricted to those candidates' rows. At most ``per_candidate`` chunks
+    are kept per candidate, so the context covers several people instead
+    of repeating one resume.
+    """
+
+    vectorstore: LocalVectorStore
+    candidates: LocalVectorStore
+    ranker: CandidateRanker
+    k: int = 5
+    candidates_k: int = 3
+    per_candidate: int = 2
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        return self.search_by_vector(query, self.vectorstore.embeddings.embed_query(query))
+
+    def search_by_vector(self, query: str, embedding: List[float]) -> List[Document]:
+        """Two-stage search with the query's precomputed embedding."""
+        sources = [source for source, _ in self.candidates.search_ids(embedding, self.candidates_k)]
+        if not sources:
+            return []
+        # The chosen candidates have few chunks, so rank all of them and cap per candidate
+        mask = self.ranker.row_mask(sources)
+        hits = self.vectorstore.similarity_search_by_vector(embedding, k=int(mask.sum()), row_mask=mask)
+        kept: Dict[str, int] = {}
+        documents = []
+        for doc in hits:
+            source = str(doc.metadata.get("source", ""))
+            if kept.get(source, 0) < self.per_candidate:
+                kept[source] = kept.get(source, 0) + 1
+                documents.append(doc)
+        return documents[:self.k]
@@ -0,0 +1,117 @@
+"""Long-lived RAG runtime shared by request handlers."""
+import os
+import logging
+import threading
+from typing import Optional
+from langchain.schema import BaseRetriever
+from services import chat_service
+from services.bm25_index import BM25Index
+from services.context_packing import context_token_budget
+from services.document_service import (
+    get_vector_store, get_keyword_index, get_ranking_store, get_candidate_index, get_index_version
+)
+from services.local_store import LocalVectorStore
+from services.ranking import CandidateRanker
+from services.retrievers import CandidateRetriever, HybridRetriever, KeywordRetriever
+
+RETRIEVER_MODES = ("vector", "keyword", "hybrid", "candidate")
+
+logger = logging.getLogger(__name__)
+
+
+class RAGRuntime:
+    """Vector store, retriever and chain built once per index version.
+
+    A runtime is never mutated after construction, so request threads can use
+    it without locking. When the index changes a new runtime is built and
+    swapped in; requests already running keep the runtime they started with.
+    """
+
+    def __init__(
+        self,
+        vectorstore,
+        version: int,
+        keyword_index: Optional[BM25Index] = None,
+        ranking_store: Optional[LocalVectorStore] = None,
+        candidate_index: Optional[LocalVectorStore] = None
+    ):
+        self.vectorstore = vectorstore
+        self.version = version
+        self.keyword_index = keyword_index
+        self.ranker = CandidateRanker(ranking_store) if ranking_store is not None else None
+        self.retrievers = {"vector": vectorstore.as_retriever(search_kwargs={"k": 5})}
+        if keyword_index is not None:
+            self.retrievers["keyword"] = KeywordRetriever(index=keyword_index, k=5)
+            self.retrievers["hybrid"] = HybridRetriever(vectorstore=vectorstore, index=keyword_index, k=5)
+        if self.ranker is not None and candidate_index is not None:
+            self.retrievers["candidate"] = CandidateRetriever(
+                vectorstore=ranking_store, candidates=candidate_index, ranker=self.ranker, k=5
+            )
+        self.default_mode = "vector"
+        configured = os.environ.get("RETRIEVER_MODE", "vector").strip().lower()
+        if configured in RETRIEVER_MODES and configured not in self.retrievers:
+            logger.warning(f"RETRIEVER_MODE {configured!r} is not available for this index; defaulting to vector")
+        else:
+            self.default_mode = self.resolve_mode(configured)
+        self.retriever = self.retrievers[self.default_mode]
+        model = chat_service.get_llm()
+        self.chain = chat_service.HR_PROMPT | model
+        # Retrieved context is packed to the budget of the model this chain calls
+        self.context_budget = context_token_budget(getattr(model, "model_name", None))
+
+    def resolve_mode(self, mode: Optional[str] = None) -> str:
+        """Retriever mode to use for a request.
+        
+        Raises ValueError for an unknown mode, or for one whose index this
+        runtime does not have (e.g. ``keyword`` without a BM25 index).
+        """
+        mode = (mode or self.default_mode).strip().lower()
+        if mode not in RETRIEVER_MODES:
+            raise ValueError(f"Unknown retriever mode {mode!r}; expected one of {', '.join(RETRIEVER_MODES)}")
+        if mode not in self.retrievers:
+            raise ValueError(f"Retriever mode {mode!r} is not available for this index; available: {', '.join(self.retrievers)}")
+        return mode
+
+    def get_retriever(self, mode: Optional[str] = None) -> BaseRetriever:
+        return self.retrievers[self.resolve_mode(mode)]
+
+
+_runtime: Optional[RAGRuntime] = None
+_lock = threading.Lock()
+
+
+def get_runtime() -> Optional[RAGRuntime]:
+    """Return the runtime for the current index version, building it when the version changes.
+
+    The version is shared through the index state directory, so an ingest run
+    by any worker process is picked up by the others on their next request.
+    """
+    version = get_index_version()
+    runtime = _runtime
+    if runtime is not None and runtime.version == version:
+        return runtime
+    return rebuild_runtime(version)
+
+
+def rebuild_runtime(version: Optional[int] = None) -> Optional[RAGRuntime]:
+    """Build a runtime for the current index and atomically swap it in."""
+    global _runtime
+    version = get_index_version() if version is None else version
+    with _lock:
+        if _runtime is not None and _runtime.version == version:
+            return _runtime
+
+        vectorstore = get_vector_store()
+        if not vectorstore:
+            return None
+        _runtime = RAGRuntime(
+            vectorstore,
+            version,
+            keyword_index=get_keyword_index(),
+            ranking_store=get_ranking_store(),
+            candidate_index=get_candidate_index()
+        )
+        # Answers computed against the previous index must not be served again
+        chat_service.answer_cache.clear()
+        logger.info(f"RAG runtime ready for index version {version}")
+        return _runtime
@@ -0,0 +1,144 @@
+"""Coalesce concurrent identical computations into one in-flight call."""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class FlightAbandoned(Exception):
+    """The leader stopped before producing a result (e.g. its client disconnected); the caller should retry."""
+
+
+class Flight:
+    """One in-flight computation that followers wait on."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._value: Any = None
+        self._error: BaseException = None
+
+    def wait(self) -> Any:
+        """Block until the leader finishes; return its value or raise its error."""
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+class SingleFlight:
+    """Share one computation among threads that ask for the same key at the same time.
+
+    The first caller for a key becomes the leader and computes the value;
+    callers arriving while it runs wait and get the same value, or the same
+    exception. Nothing is kept once the leader finishes, so this is not a
+    cache: the next call for the key starts a new computation.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Flight] = {}
+        self._lock = threading.Lock()
+
+    def join(self, key: Hashable) -> Tuple[Flight, bool]:
+        """Return the key's flight and whether the caller leads it (and must finish or abandon it)."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = Flight()
+            return flight, True
+
+    def finish(self, key: Hashable, flight: Flight, value: Any = None, error: BaseException = None) -> None:
+        """Publish the leader's value (or error) to its followers."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight._value, flight._error = value, error
+        flight._done.set()
+
+    def abandon(self, key: Hashable, flight: Flight) -> None:
+        """End a flight without a result; its followers retry and one of them takes over."""
+        self.finish(key, flight, error=FlightAbandoned())
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return ``(fn(), False)`` as leader, or ``(leader's value, True)`` as a follower."""
+        while True:
+            flight, leader = self.join(key)
+            if not leader:
+                try:
+                    return flight.wait(), True
+                except FlightAbandoned:
+                    continue
+            try:
+                value = fn()
+            except BaseException as e:
+                self.finish(key, flight, error=e)
+                raise
+            self.finish(key, flight, value)
+            return value, False
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+
+class AsyncSingleFlight:
+    """``SingleFlight`` for coroutines running on one event loop.
+
+    Flights are asyncio futures, awaited through ``asyncio.shield``. In
+    ``do`` the leader's work runs as a separate task, so neither a
+    cancelled follower nor a cancelled leader stops it. A leader that
+    finishes flights itself and stops early (a closed stream) abandons
+    its flight, and a follower takes over.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+
+    def join(self, key: Hashable) -> Tuple[asyncio.Future, bool]:
+        flight = self._flights.get(key)
+        if flight is not None and not flight.done():
+            return flight, False
+        flight = self._flights[key] = asyncio.get_running_loop().create_future()
+        # Retrieve the result so an error nobody waited for is not logged as never retrieved
+        flight.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return flight, True
+
+    def finish(self, key: Hashable, flight: asyncio.Future, value: Any = None, error: BaseException = None) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if flight.done():
+            return
+        if error is not None:
+            flight.set_exception(error)
+        else:
+            flight.set_result(value)
+
+    def abandon(self, key: Hashable, flight: asyncio.Future) -> None:
+        self.finish(key, flight, error=FlightAbandoned())
+
+    async def wait(self, flight: asyncio.Future) -> Any:
+        return await asyncio.shield(flight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Async ``SingleFlight.do``: ``fn`` is a coroutine function."""
+        while True:
+            flight, leader = self.join(key)
+            if not leader:
+                try:
+                    return await self.wait(flight), True
+                except FlightAbandoned:
+                    continue
+            # Run fn as its own task so the work survives the leader being cancelled
+            task = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda t: self._settle(key, flight, t))
+            return await asyncio.shield(task), False
+
+    def _settle(self, key: Hashable, flight: asyncio.Future, task: asyncio.Task) -> None:
+        if task.cancelled():
+            self.abandon(key, flight)
+        elif task.exception() is not None:
+            self.finish(key, flight, error=task.exception())
+        else:
+            self.finish(key, flight, task.result())
+
+    def __len__(self) -> int:
+        return len(self._flights)
@@ -0,0 +1,155 @@
+"""Size-bounded LRU tables in SQLite, shared by threads and worker processes."""
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# SQLite's default limit on bound parameters is 999
+_QUERY_BATCH = 500
+
+
+class SQLiteLRU:
+    """Key-value table in a SQLite file, evicted least recently used first.
+
+    Rows are ``(key, *columns, size, last_access)``. Reads never write:
+    the access times of hits are buffered and written in one transaction
+    once ``touch_batch`` keys or ``touch_interval`` seconds have piled up,
+    along with the next write, or before an eviction. Recency is therefore
+    approximate by at most that much. Once writes since the last check add
+    up to 5% of ``max_bytes``, entries are evicted until the table is back
+    under 90% of it.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        table: str,
+        columns: Dict[str, str],
+        max_bytes: int,
+        touch_batch: int = 256,
+        touch_interval: float = 30.0
+    ):
+        self.path = path
+        self.table = table
+        self.columns = list(columns)
+        self.max_bytes = max_bytes
+        self.touch_batch = touch_batch
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pending_bytes = 0
+        self._touched: Dict[str, float] = {}
+        self._touched_since = time.monotonic()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        definitions = "".join(f"{name} {kind}, " for name, kind in columns.items())
+        conn = self._connection()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            f"key TEXT PRIMARY KEY, {definitions}size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table} (last_access)")
+        conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Tuple[Any, ...]]:
+        """Column values of the keys that are present; their access time is recorded in memory."""
+        conn = self._connection()
+        unique = list(dict.fromkeys(keys))
+        found = {}
+        for start in range(0, len(unique), _QUERY_BATCH):
+            batch = unique[start:start + _QUERY_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT key, {', '.join(self.columns)} FROM {self.table} WHERE key IN ({placeholders})", batch
+            )
+            for key, *values in rows:
+                found[key] = tuple(values)
+
+        if found:
+            now = time.time()
+            with self._lock:
+                self._touched.update((key, now) for key in found)
+                due = (
+                    len(self._touched) >= self.touch_batch
+                    or time.monotonic() - self._touched_since >= self.touch_interval
+                )
+            if due:
+                self._flush_touched(conn)
+        return found
+
+    def put_many(self, entries: List[Tuple[str, Tuple[Any, ...], int]]) -> None:
+        """Insert or replace ``(key, column values, size in bytes)`` entries."""
+        if not entries:
+            return
+        conn = self._connection()
+        now = time.time()
+        columns = ", ".join(["key", *self.columns, "size", "last_access"])
+        placeholders = ", ".join("?" * (len(self.columns) + 3))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {self.table} ({columns}) VALUES ({placeholders})",
+            [(key, *values, size, now) for key, values, size in entries]
+        )
+        # Buffered access times ride along in the same transaction
+        self._flush_touched(conn, commit=False)
+        conn.commit()
+
+        with self._lock:
+            self._pending_bytes += sum(size for _, _, size in entries)
+            check = self._pending_bytes >= self.max_bytes // 20
+            if check:
+                self._pending_bytes = 0
+        if check:
+            self._evict(conn)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._touched.clear()
+        conn = self._connection()
+        conn.execute(f"DELETE FROM {self.table}")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets worker processes share the file."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _flush_touched(self, conn: sqlite3.Connection, commit: bool = True) -> None:
+        """Write the buffered access times."""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            self._touched_since = time.monotonic()
+        if not touched:
+            return
+        conn.executemany(
+            f"UPDATE {self.table} SET last_access = MAX(last_access, ?) WHERE key = ?",
+            [(when, key) for key, when in touched.items()]
+        )
+        if commit:
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least recently used entries until the table is back under 90% of max_bytes."""
+        self._flush_touched(conn)
+        total = conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        excess = total - int(self.max_bytes * 0.9)
+        victims, freed = [], 0
+        for key, size in conn.execute(f"SELECT key, size FROM {self.table} ORDER BY last_access"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", victims)
+        conn.commit()
+        logger.info(f"Evicted {len(victims)} cached {self.table} ({freed} bytes)")
@@ -0,0 +1,44 @@
+"""Incremental sync against an index that was built without a manifest."""
+import pytest
+from benchmarks.fakes import offline_environment, FakeEmbeddings
+
+offline_environment()
+
+from services import document_service  # noqa: E402
+from services.index_manifest import load_index_pointer  # noqa: E402
+
+
+@pytest.fixture
+def local_index(tmp_path, monkeypatch):
+    monkeypatch.setenv("VECTOR_STORE_BACKEND", "local")
+    monkeypatch.setenv("INDEX_STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", "")
+    monkeypatch.setenv("EMBED_TOKENS_PER_MINUTE", "0")
+    monkeypatch.delenv("LOCAL_INDEX_DIR", raising=False)
+    monkeypatch.setattr(document_service, "embeddings", FakeEmbeddings())
+
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    for i in range(4):
+        (corpus / f"resume_{i}.txt").write_text(f"Candidate {i} has {i + 3} years of Python and AWS{i}.")
+    return corpus
+
+
+def test_first_sync_of_baseline_index_does_not_duplicate_chunks(local_index):
+    # create_vector_store is how indexes were built before manifests: random IDs, no manifest
+    baseline = document_service.create_vector_store(document_service.iter_documents(str(local_index)))
+    assert baseline is not None and baseline.count() == 4
+
+    summary = document_service.sync_vector_store(str(local_index))
+
+    pointer = load_index_pointer()
+    assert summary["generation"] == pointer["active"] != "default"
+    assert pointer["previous"] == "default"
+    assert document_service.get_vector_store().count() == 4
+    assert len(document_service.get_keyword_index().ids) == 4
+
+    # The rebuilt generation has a manifest, so the next sync is incremental and a no-op
+    again = document_service.sync_vector_store(str(local_index))
+    assert again["generation"] == pointer["active"]
+    assert again["changed"] == 0
+    assert document_service.get_vector_store().count() == 4